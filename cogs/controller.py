@@ -1,24 +1,49 @@
+import time
+from collections import OrderedDict
+
 from discord import Guild
 from discord.ext.commands.cog import Cog
 
+from config.configuration import GUILD_IDLE_TIMEOUT
+
 class Controller(Cog):
     """A base class that Cog Controllers derive from.
         :param self.bot: A reference to the discord Bot which is constructing the Controller.
-        :param self.clazz: A reference to the class which the Controller will construct an instance of for each guild the Bot is a part of.
-        :param self.gulds_to_clazzs: Dictionary storing all the guilds and clazzs that a controller owns."""
+        :param self.clazz: A reference to the class which the Controller will construct an instance of for each guild that uses it.
+        :param self.gulds_to_clazzs: Dictionary storing all the guilds and clazzs that a controller owns, least recently used first.
+        :param self.idle_timeout: Seconds a guild's clazz can go unused before the Controller drops it."""
 
-    def __init__(self, bot, controlled_class):
+    def __init__(self, bot, controlled_class, idle_timeout:float = GUILD_IDLE_TIMEOUT):
         self.bot = bot
         self.clazz = controlled_class
-        self.guilds_to_clazzs:dict = {guild : self.clazz(self.bot, guild) for guild in self.bot.guilds}
+        self.idle_timeout = idle_timeout
+        # clazzs are built the first time a guild uses the controller, not for every guild up front
+        self.guilds_to_clazzs:OrderedDict[Guild, object] = OrderedDict()
+        self.last_used:dict[Guild, float] = {}
 
     def safeAddGuild(self, guild) -> None:
         """Adds input `guild` to `guilds_to_clazzs` if it doesn't already exist there."""
         if guild not in self.guilds_to_clazzs:
-            self.guilds_to_clazzs[guild] = self.clazz(self.bot) 
+            self.guilds_to_clazzs[guild] = self.clazz(self.bot, guild)
+
+    def evictIdleGuilds(self) -> None:
+        """Drops the clazz of every guild that hasn't used the controller in `idle_timeout` seconds.\n
+        A clazz can keep itself alive by defining `canEvict()` and returning False, e.g. while a game is running."""
+        cutoff = time.monotonic() - self.idle_timeout
+        for guild in list(self.guilds_to_clazzs):
+            if self.last_used.get(guild, 0.0) > cutoff:
+                break # everything after this was used more recently
+            can_evict = getattr(self.guilds_to_clazzs[guild], "canEvict", None)
+            if can_evict is not None and not can_evict():
+                continue
+            del self.guilds_to_clazzs[guild]
+            self.last_used.pop(guild, None)
 
     def getGuildClazz(self, ctx):
         """Returns the self.clazz associated with the current guild."""
         guild = ctx.guild
+        self.evictIdleGuilds()
         self.safeAddGuild(guild)
-        return self.guilds_to_clazzs[guild]
\ No newline at end of file
+        self.guilds_to_clazzs.move_to_end(guild)
+        self.last_used[guild] = time.monotonic()
+        return self.guilds_to_clazzs[guild]
@@ -1,3 +1,9 @@
+import time
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
 from discord import Embed
 from discord import Member, User
 from discord.ext import commands
@@ -5,51 +11,224 @@ from discord.ext.commands import Cog
 from discord.ext.commands import Context
 
 import db
-from db import DBConnection
+from db import AsyncDBConnection, TransactionQueue
+from messaging import DeletionScheduler
+from config.configuration import BALANCE_CACHE_TTL
+
+
+class BalanceCache:
+    """Short-lived copy of recently read balances, keyed by user id.\n
+    Entries expire after `ttl` seconds, and the Economy cog drops a user's entry whenever it changes their balance."""
+
+    def __init__(self, ttl:float):
+        self.ttl = ttl
+        self.entries:dict[str, tuple[float, int]] = {} # {user_id : (expires_at, gleepcoins)}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id:str) -> int | None:
+        """Returns the cached balance, or None if there isn't a fresh one."""
+        entry = self.entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            del self.entries[user_id]
+        self.misses += 1
+        return None
+
+    def put(self, user_id:str, amount:int) -> None:
+        self.entries[user_id] = (time.monotonic() + self.ttl, amount)
+
+    def invalidate(self, *user_ids:str) -> None:
+        for user_id in user_ids:
+            self.entries.pop(user_id, None)
 
 
 class Economy(Cog):
 
-    def __init__(self, bot, db_connection:DBConnection):
+    LEADERBOARD_PAGE_SIZE = 10
+    STATEMENT_PAGE_SIZE = 10
+
+    # guild memberships already recorded in storage by this process, shared by every Economy instance
+    recorded_members:set[tuple[int, int]] = set() # {(guild_id, user_id)}
+    synced_guilds:set[int] = set()
+    # shared by every Economy instance, so one cog's write invalidates what the others read
+    balances = BalanceCache(BALANCE_CACHE_TTL)
+    # one lock per user with a balance change in flight, dropped once nobody holds or waits on it
+    user_locks:"weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def __init__(self, bot, db_connection:AsyncDBConnection):
         self.bot = bot
         self.connection = db_connection
+        self.transactions = TransactionQueue.shared()
+        self.deleter = DeletionScheduler.shared()
 
-    async def withdraw_money_player(self, ctx:Context, player:Member | User, money:int) -> bool:
-        self.connection.create_bank_user_if_none(player.name, str(player.id))
+    @asynccontextmanager
+    async def _locked(self, *user_ids:str):
+        """Holds the balance locks for `user_ids`, so changes to the same user run one at a time while different users stay concurrent.\n
+        Locks are always taken in sorted order, so two settlements sharing players can't deadlock."""
+        locks = []
+        for user_id in sorted(set(user_ids)):
+            lock = Economy.user_locks.get(user_id)
+            if lock is None:
+                lock = asyncio.Lock()
+                Economy.user_locks[user_id] = lock
+            locks.append(lock)
+        acquired = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    async def _provision(self, player:Member | User) -> None:
+        """Makes sure a player has a bank account, and that their guild membership is recorded for the leaderboard."""
+        await self.connection.create_bank_user_if_none(player.name, str(player.id))
+        guild = getattr(player, "guild", None) # only Members belong to a guild
+        if guild is not None and (guild.id, player.id) not in Economy.recorded_members:
+            await self.connection.add_guild_members(str(guild.id), [str(player.id)])
+            Economy.recorded_members.add((guild.id, player.id))
+
+    async def _sync_guild_members(self, guild) -> None:
+        """Records every cached member of `guild` in storage, once per process, so players from before the membership table existed show up on the leaderboard.\n
+        Members who left while the bot was offline are dropped from storage at the same time."""
+        if guild.id in Economy.synced_guilds:
+            return
+        member_ids = [member.id for member in guild.members]
+        current = {str(member_id) for member_id in member_ids}
+        departed = await self.connection.get_guild_member_ids(str(guild.id)) - current
+        if departed:
+            await self.connection.remove_guild_members(str(guild.id), list(departed))
+        await self.connection.add_guild_members(str(guild.id), list(current))
+        Economy.recorded_members.update((guild.id, member_id) for member_id in member_ids)
+        Economy.synced_guilds.add(guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member:Member) -> None:
+        """Takes members who leave a guild off its leaderboard."""
+        await self.connection.remove_guild_members(str(member.guild.id), [str(member.id)])
+        Economy.recorded_members.discard((member.guild.id, member.id))
+
+    async def withdraw_money_player(self, ctx:Context, player:Member | User, money:int, reason:str = "withdrawal") -> bool:
+        await self._provision(player)
         withdraw_amount = int(money)
-        current_balance = self.connection.get_user_amount(player.id)
-        if withdraw_amount > current_balance:
-            broke_message = await ctx.send(embed = Embed(title=f"{player.name}, you're broke. Your current balance is {current_balance}."))
-            await broke_message.delete(delay=10.0)
-            return False
-        else:
-            self.connection.set_user_amount(player.id, current_balance - withdraw_amount)
+        async with self._locked(str(player.id)):
+            succeeded = await self.connection.adjust_user_amount(str(player.id), -withdraw_amount)
+            # a failed withdrawal means our cached balance may have been wrong too
+            Economy.balances.invalidate(str(player.id))
+            if succeeded:
+                self.transactions.record(str(player.id), -withdraw_amount, reason)
+        if succeeded:
             return True
+        # only look up the balance when we need it for the broke message
+        current_balance = await self._get_balance(player)
+        broke_message = await ctx.send(embed = Embed(title=f"{player.name}, you're broke. Your current balance is {current_balance}."))
+        self.deleter.schedule(broke_message, 10.0)
+        return False
 
-    async def give_money_player(self, player:Member | User, money:int) -> None:
+    async def give_money_player(self, player:Member | User, money:int, reason:str = "deposit") -> None:
         money = int(money)
-        self.connection.create_bank_user_if_none(player.name, str(player.id))
-        current_amount = self.connection.get_user_amount(player.id)
-        self.connection.set_user_amount(player.id, current_amount + money)
+        await self._provision(player)
+        async with self._locked(str(player.id)):
+            if await self.connection.adjust_user_amount(str(player.id), money):
+                self.transactions.record(str(player.id), money, reason)
+            Economy.balances.invalidate(str(player.id))
+
+    async def buy_in(self, player:Member | User, max_amount:int, reason:str = "buy-in") -> int:
+        """Moves up to `max_amount` of a player's balance out of the bank and onto a game table. Returns the amount bought in."""
+        await self._provision(player)
+        # the lock keeps the balance from moving between reading and withdrawing it
+        async with self._locked(str(player.id)):
+            balance = await self.connection.get_user_amount(str(player.id))
+            if not balance or balance < 0:
+                return 0
+            amount = min(balance, int(max_amount))
+            if amount <= 0 or not await self.connection.adjust_user_amount(str(player.id), -amount):
+                return 0
+            Economy.balances.invalidate(str(player.id))
+            self.transactions.record(str(player.id), -amount, reason)
+            return amount
 
-    def _get_balance(self, player:Member|User):
-        amount = self.connection.get_user_amount(player.id)
+    async def settle(self, payouts:dict[Member | User, int], reason:str = "settlement", attempts:int = 2) -> bool:
+        """Pays out a whole round at once, `{player : amount}`, in a single transaction. Returns False if nothing was paid.\n
+        The settlement is all or nothing, so payees without a bank account are provisioned first; that's an in-memory check for everyone who's already known."""
+        payouts = {player: int(amount) for player, amount in payouts.items() if int(amount) != 0}
+        if not payouts:
+            return True
+        for player in payouts:
+            if not self.connection.is_known_user(str(player.id)):
+                await self._provision(player)
+        deltas = {str(player.id): amount for player, amount in payouts.items()}
+        success = False
+        async with self._locked(*deltas):
+            for attempt in range(attempts):
+                success = await self.connection.apply_settlement(deltas)
+                if success:
+                    break
+            Economy.balances.invalidate(*deltas)
+            if success:
+                for user_id, delta in deltas.items():
+                    self.transactions.record(user_id, delta, reason)
+        if not success:
+            print(f"Failed to settle {reason} after {attempts} attempts: {deltas}")
+        return success
+
+    async def _get_balance(self, player:Member|User):
+        """Returns a player's balance, from the balance cache if it was read recently."""
+        user_id = str(player.id)
+        amount = Economy.balances.get(user_id)
+        if amount is None:
+            # read under the lock so a balance read mid-change can't be cached after that change invalidates it
+            async with self._locked(user_id):
+                amount = await self.connection.get_user_amount(user_id)
+                if amount is not None:
+                    Economy.balances.put(user_id, amount)
         return amount
 
     @commands.command("balance")
     async def get_balance(self, ctx:Context) -> None:
-        amount = self.connection.get_user_amount(ctx.author.id)
+        amount = await self._get_balance(ctx.author)
         if amount is None:
-            self.connection.create_bank_user_if_none(ctx.author.name, ctx.author.id)
-            amount = self.connection.get_user_amount(ctx.author.id)
+            await self._provision(ctx.author)
+            amount = await self._get_balance(ctx.author)
         message = await ctx.send(embed = Embed(title=f"{ctx.author.name}'s balance is: {amount} GleepCoins."))
-        await message.delete(delay=7.5)
+        self.deleter.schedule(message, 7.5)
 
     @commands.command("pocketWatch")
-    async def pocket_watch(self, ctx:Context):
-        bank_df_string = self.connection.stringify_all_user_amounts(ctx)
-        await ctx.send(embed = Embed(title=f"Domain Expansion: Pocket Watch", description=bank_df_string))
+    async def pocket_watch(self, ctx:Context, page:int = 1):
+        page = max(int(page), 1)
+        offset = (page - 1) * Economy.LEADERBOARD_PAGE_SIZE
+        await self._sync_guild_members(ctx.guild)
+        rows = await self.connection.get_guild_leaderboard(str(ctx.guild.id), Economy.LEADERBOARD_PAGE_SIZE, offset)
+        leaderboard_string = ""
+        for place, (username, gleepcoins) in enumerate(rows, start=offset + 1):
+            leaderboard_string += f"{place}. {username}: {gleepcoins} GleepCoins\n"
+        if leaderboard_string == "":
+            leaderboard_string = "Nobody's on this page."
+        em = Embed(title=f"Domain Expansion: Pocket Watch", description=leaderboard_string)
+        em.set_footer(text=f"Page {page}. Use `$pocketWatch {page + 1}` to see the next page.")
+        await ctx.send(embed = em)
+
+    @commands.command("statement")
+    async def statement(self, ctx:Context, before_id:int | None = None):
+        # make sure the caller's latest transactions are in the ledger before reading it
+        await self.transactions.flush()
+        rows = await self.connection.get_user_transactions(str(ctx.author.id), before_id, Economy.STATEMENT_PAGE_SIZE)
+        statement_string = ""
+        for transaction_id, delta, reason, created_at in rows:
+            when = datetime.fromtimestamp(created_at, tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
+            statement_string += f"`#{transaction_id}` {when} UTC: {delta:+} GleepCoins ({reason})\n"
+        if statement_string == "":
+            statement_string = "No transactions to show."
+        em = Embed(title=f"{ctx.author.name}'s Statement", description=statement_string)
+        if len(rows) == Economy.STATEMENT_PAGE_SIZE:
+            em.set_footer(text=f"Use `$statement {rows[-1][0]}` to see older transactions.")
+        await ctx.send(embed = em)
 
 async def setup(bot):
-    connection = db.get_db_connection("Economy cog")
+    connection = db.get_async_db_connection("Economy cog")
     await bot.add_cog(Economy(bot, connection))
\ No newline at end of file
@@ -1,16 +1,20 @@
 import csv
+import time
 import random
 import asyncio
-from collections import Counter
+import itertools
+from collections import deque
 
 from discord.ext import commands
 from discord.ext.commands.cog import Cog
-from discord import Member, Embed, TextChannel
+from discord import Member, Embed, TextChannel, Thread, ChannelType, ButtonStyle, Interaction, HTTPException, NotFound
+from discord.ui import View, Button
 
-from db import get_db_connection
+from db import get_async_db_connection
+from messaging import DeletionScheduler, OutboundQueue, RestScheduler, Priority
 from cogs.economy import Economy
 from cogs.controller import Controller
-from config.configuration import THREADS_PATH, DB_OPTION
+from config.configuration import THREADS_PATH, DB_OPTION, TABLE_SIZE, POKER_MAX_BUY_IN
 
 
 class Card:
@@ -175,32 +179,6 @@ class Deck:
         "king": 10,
     }
 
-    @staticmethod
-    def bubbleSortCards(cards_list:list) -> None:
-        """Function sorts a list of Card objects, in place."""
-        n = len(cards_list)
-        # optimize code, so if the array is already sorted, it doesn't need
-        # to go through the entire process
-        swapped = False
-        # Traverse through all array elements
-        for i in range(n-1):
-            # range(n) also work but outer loop will
-            # repeat one time more than needed.
-            # Last i elements are already in place
-            for j in range(0, n-i-1):
-    
-                # traverse the array from 0 to n-i-1
-                # Swap if the element found is greater
-                # than the next element
-                if cards_list[j].pip_value > cards_list[j + 1].pip_value:
-                    swapped = True
-                    cards_list[j], cards_list[j + 1] = cards_list[j + 1], cards_list[j]
-            
-            if not swapped:
-                # if we haven't needed to make a single swap, we
-                # can just exit the main loop.
-                return
-
     def __init__(self, game:str):
         """
         Game accepts 'poker' or 'blackjack' as arguments.\n
@@ -248,12 +226,10 @@ class Player:
         self.thread = None
         self.folded = False
         self.hand_rank = 16
-        # the combination of a player's cards and the community cards/ the board (7 cards) - stored in pip format
-        self.complete_hand:list[Card] = []
+        # the HandEvaluator's score for a player's best hand, lower is better
+        self.hand_value = 7463
         # a player's best hand, which assigned them their hand_rank (5 or less cards) 
         self.ranked_hand = []
-        # possible_hands contains a player's best possible hand at each possible hand rank
-        self.possible_hands:dict[int, list[Card]] = {}
     
     # poker method. ACTUALLY NOT USED LOL
     def setBestHand(self, new_best_hand:list) -> None:
@@ -317,88 +293,293 @@ class Player:
         """
         return self.hand + community_cards
 
-    def removeCard(self, card_value:int) -> None:
-        """
-        Removes a card from the player's `complete_hand`, by pip value.\n
-        If more than one card exists in the hand with the input card value, only the first instance will be removed."""
-        for card in self.complete_hand:
-            if card.pip_value == card_value:
-                self.complete_hand.remove(card)
-                break
-        
-    def removeCards(self, card_values:list[int]) -> None:
-        """
-        Removes cards from the player's `complete_hand`, pip values."""
-        for value in card_values:
-            self.removeCard(value)
+
+class Matchmaker:
+    """
+    Splits a lobby of queued players into game tables.\n
+    Tables hold at most `table_size` players and are filled as evenly as possible, in the order players joined. Players who can't make up a table of at least `min_players` wait for the next game."""
+    def __init__(self, table_size:int = TABLE_SIZE, min_players:int = 2):
+        self.table_size = max(table_size, min_players)
+        self.min_players = min_players
+
+    def makeTables(self, players:list[Player]) -> list[list[Player]]:
+        num_players = len(players)
+        if num_players < self.min_players:
+            return []
+        num_tables = -(-num_players // self.table_size) # ceiling division
+        base_size, remainder = divmod(num_players, num_tables)
+        tables = []
+        start = 0
+        for i in range(num_tables):
+            size = base_size + (1 if i < remainder else 0)
+            if size >= self.min_players:
+                tables.append(players[start:start + size])
+            start += size
+        return tables
+
+
+class GameInputRouter:
+    """
+    Delivers typed player input to the game coroutine waiting for it, instead of every game waking up on every message the bot sees.\n
+    Messages are routed by (channel id, user id). The GamesController's listener feeds messages in, and anything nobody is waiting for is dropped straight away. Button presses don't need routing, each ActionPrompt receives its own interactions."""
+
+    _shared:"GameInputRouter | None" = None
+
+    @classmethod
+    def shared(cls) -> "GameInputRouter":
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def __init__(self):
+        self.messages:dict[tuple[int, int], asyncio.Future] = {} # (channel id, user id) : waiting future
+
+    async def _wait(self, waiters:dict, key:tuple[int, int], timeout:float | None):
+        future = asyncio.get_running_loop().create_future()
+        waiters[key] = future
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            if waiters.get(key) is future:
+                del waiters[key]
+
+    async def waitForMessage(self, channel, member:Member, timeout:float | None = None):
+        """Returns the next message `member` sends in `channel`. Raises asyncio.TimeoutError like `bot.wait_for`."""
+        return await self._wait(self.messages, (channel.id, member.id), timeout)
+
+    def dispatchMessage(self, message) -> None:
+        future = self.messages.get((message.channel.id, message.author.id))
+        if future is not None and not future.done():
+            future.set_result(message)
+
+
+class ActionPrompt(View):
+    """
+    A row of buttons for one player's turn, sent along with the prompt message so no reactions need adding afterwards.\n
+    `actions` maps each button's emoji to its label. Only `member` can press the buttons, and the first press answers the prompt."""
+    def __init__(self, member:Member, actions:dict[str, str], timeout:float | None = 60.0):
+        super().__init__(timeout=timeout)
+        self.member = member
+        self.choice:asyncio.Future = asyncio.get_running_loop().create_future()
+        for emoji, label in actions.items():
+            button = Button(label=label, emoji=emoji, style=ButtonStyle.primary)
+            button.callback = self._chooser(emoji)
+            self.add_item(button)
+
+    def _chooser(self, emoji:str):
+        async def choose(interaction:Interaction) -> None:
+            if not self.choice.done():
+                self.choice.set_result((emoji, interaction.user))
+            self.stop()
+            # answering the interaction with the button-less message is the acknowledgement, no extra request needed
+            await interaction.response.edit_message(view=None)
+        return choose
+
+    async def interaction_check(self, interaction:Interaction) -> bool:
+        if interaction.user.id == self.member.id:
+            return True
+        await interaction.response.send_message("It's not your turn.", ephemeral=True)
+        return False
+
+    async def on_timeout(self) -> None:
+        if not self.choice.done():
+            self.choice.set_exception(asyncio.TimeoutError())
+
+    async def waitForChoice(self) -> tuple[str, Member]:
+        """Returns `(emoji, user)` for the button the player pressed. Raises asyncio.TimeoutError if they didn't press one in time."""
+        return await self.choice
+
+
+class TableDisplay:
+    """
+    One embed per table that's edited in place as the game changes, instead of a new message for every pot change or action.\n
+    `update()` only marks the table as changed. At most one edit is made every `min_interval` seconds, showing whatever the state is by then, so a burst of changes costs a single request."""
+    def __init__(self, channel:TextChannel | Thread, render, min_interval:float = 2.0, history:int = 5):
+        self.channel = channel
+        self.render = render # () -> Embed of the table's current state
+        self.min_interval = min_interval
+        self.events:deque[str] = deque(maxlen=history) # the latest actions, shown at the bottom of the embed
+        self.message = None
+        self._last_edit = 0.0
+        self._pending:asyncio.Task | None = None
+        self._edit_lock = asyncio.Lock()
+        self.rest = RestScheduler.shared()
+
+    def log(self, event:str) -> None:
+        """Adds a line to the table's recent actions."""
+        self.events.append(event)
+        self.update()
+
+    def update(self) -> None:
+        """Schedules an edit, unless one is already waiting to go out."""
+        if self._pending is None or self._pending.done():
+            self._pending = asyncio.create_task(self._editLater())
+
+    async def _editLater(self) -> None:
+        delay = self._last_edit + self.min_interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # changes made from here on need an edit of their own
+        self._pending = None
+        await self._edit()
+
+    async def _edit(self) -> None:
+        async with self._edit_lock:
+            self._last_edit = time.monotonic()
+            embed = self.render()
+            try:
+                if self.message is not None:
+                    try:
+                        await self.rest.edit(self.message, Priority.GAME_STATE, embed=embed)
+                        return
+                    except NotFound:
+                        pass # someone deleted the table, send it again
+                self.message = await self.rest.send(self.channel, Priority.GAME_STATE, embed=embed)
+            except HTTPException as e:
+                print(f"Error updating the table display: {e}")
+
+    async def flush(self) -> None:
+        """Shows the current state right away, in place of any edit that's waiting."""
+        if self._pending is not None and not self._pending.done():
+            self._pending.cancel()
+        self._pending = None
+        await self._edit()
+
+
+class TableManager:
+    """
+    Runs any number of independent game tables for one guild.\n
+    Each table gets its own players, its own game instance and its own channel: the first table plays where the game was started unless a table is already running there, and every other table plays in a thread off that channel. Players stay in the PlayerQueue while they play, but can't be seated at two tables at once."""
+    def __init__(self, bot, player_queue):
+        self.bot = bot
+        self.player_queue = player_queue
+        self.matchmakers = {
+            Poker: Matchmaker(min_players=2),
+            BlackJackGame: Matchmaker(min_players=1), # blackjack is played against the dealer
+        }
+        self.tables:dict[int, Poker | BlackJackGame] = {} # channel id : game running in that channel
+        self.seated:set[int] = set() # member ids of everyone at a running table
+        self.tasks:set[asyncio.Task] = set() # keeps running tables from being garbage collected
+
+    def isBusy(self) -> bool:
+        return len(self.tables) > 0 or len(self.seated) > 0
+
+    async def _tableChannel(self, ctx, game_class, table_number:int) -> TextChannel | Thread:
+        if ctx.channel.id not in self.tables:
+            return ctx.channel
+        name = "Poker" if game_class is Poker else "BlackJack"
+        return await ctx.channel.create_thread(name=f"{name} table {table_number + 1}", type=ChannelType.public_thread, auto_archive_duration=60)
+
+    async def openTables(self, ctx, game_class) -> int:
+        """
+        Seats every queued player who isn't already playing at new `game_class` tables, and starts a game at each one. Returns the number of tables opened."""
+        lobby = [player for member_id, player in self.player_queue.q.items() if member_id not in self.seated]
+        tables = self.matchmakers[game_class].makeTables(lobby)
+        # seat everyone before awaiting anything, so a second command can't seat them again
+        for players in tables:
+            self.seated.update(player.member.id for player in players)
+        for table_number, players in enumerate(tables):
+            try:
+                channel = await self._tableChannel(ctx, game_class, table_number)
+                game = game_class(self.bot, players, channel)
+            except Exception:
+                # none of the tables from here on were opened, so free their players to be matched again
+                for unopened in tables[table_number:]:
+                    self.seated.difference_update(player.member.id for player in unopened)
+                raise
+            self.tables[channel.id] = game
+            task = asyncio.create_task(self._runTable(game, channel))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        return len(tables)
+
+    async def _runTable(self, game:"Poker | BlackJackGame", channel:TextChannel | Thread) -> None:
+        try:
+            await game.play()
+        except Exception as error:
+            await channel.send(f"An exception occured, {error}")
+        finally:
+            self.tables.pop(channel.id, None)
+            self.seated.difference_update(player.member.id for player in game.seated)
 
 
 class PlayerQueue(Cog):
     """
     The PlayerQueue class is used as a guild-level-distributor of the games available in the games.py 'cog'.\n
-    self.q is a list[Card]. Each player is stored as a tuple of (Player, Discord.Member) objects so that we can easily access methods to discord members.
-    Right now, I'm actually realizing that it would be much more simple if I instead just incorporated the discord.Member object into the Player class as an attribute. Removing the possibility of confusing others with tuples in the player queue."""
+    self.q is a dict[int, Player], keyed by each player's discord member id and kept in the order players joined, so looking a player up never scans the queue."""
     def __init__(self, bot, guild):
         self.bot:commands.Bot = bot
-        self.q:list[Player] = []
+        self.q:dict[int, Player] = {} # member id : Player
         self.guild = guild
-        self.economy = Economy(self.bot, get_db_connection("games cog - PlayerQueue"))
-        self.poker = Poker(self.bot, self)
-        self.blackjack = BlackJackGame(self.bot, self)
+        self.economy = Economy(self.bot, get_async_db_connection("games cog - PlayerQueue"))
+        self.tables = TableManager(self.bot, self)
+        self.deleter = DeletionScheduler.shared()
+
+    def canEvict(self) -> bool:
+        """The GamesController may only drop this guild's queue when nobody is waiting in it and no game is running."""
+        return len(self.q) == 0 and not self.tables.isBusy()
 
     async def _joinQueue(self, ctx):
         """
         This is a command giving Discord server members the ability to join the PlayerQueue, by executing the command in a text channel."""
-        new_player = Player(ctx)
         # check if person using command is already in the player pool
-        for player in self.q:
-            if ctx.author.name == player.name:
-                # if so, tell user that they're already in the queue
-                message_str = f"{ctx.author.name} is already in queue."
-                message = await ctx.send(embed = Embed(title=message_str))
-                await message.delete(delay=5.0)
-                return
+        if ctx.author.id in self.q:
+            # if so, tell user that they're already in the queue
+            message_str = f"{ctx.author.name} is already in queue."
+            message = await ctx.send(embed = Embed(title=message_str))
+            self.deleter.schedule(message, 5.0)
+            return
 
-        self.q.append(new_player)
+        self.q[ctx.author.id] = Player(ctx)
         message_str = f"{ctx.author.name} has been added to players queue."
         message = await ctx.send(embed = Embed(title=message_str))
-        await message.delete(delay=5.0)
+        self.deleter.schedule(message, 5.0)
         
     async def _leaveQueue(self, ctx):
         """
-        This command gives users the ability to leave the PlayerQueue. If a player leaves the queue, any bet they had previously set will be returned to their bank."""
+        This command gives users the ability to leave the PlayerQueue. If a player leaves the queue, any bet they had previously set will be returned to their bank.\n
+        Players can't leave while they're seated at a table, since the table pays out from their bet when the round ends."""
+        if ctx.author.id in self.q and ctx.author.id in self.tables.seated:
+            message = await ctx.send(embed = Embed(title=f"{ctx.author.name}, you can't leave the queue in the middle of a game."))
+            self.deleter.schedule(message, 5.0)
+            return
         # get player who used the command
-        for player in self.q:
-            if ctx.author.name == player.name:
-                # return the person's bet money to them, and remove them from player pool
-                await self.economy.give_money_player(ctx.author, player.bet)
-                self.q.remove(player)
-                message_str = f"{ctx.author.name} has been removed from the queue."
-                message = await ctx.send(embed = Embed(title=message_str))
-                await message.delete(delay=5.0)
-                return
+        player = self.q.pop(ctx.author.id, None)
+        if player is not None:
+            # return the person's bet money to them, now that they're out of the player pool
+            await self.economy.give_money_player(ctx.author, player.bet, "blackjack bet refund")
+            player.bet = 0
+            message_str = f"{ctx.author.name} has been removed from the queue."
+            message = await ctx.send(embed = Embed(title=message_str))
+            self.deleter.schedule(message, 5.0)
+            return
         # if command caller isn't in player pool, tell them
         message_str = f"{ctx.author.name} is not in the queue."
         message = await ctx.send(embed = Embed(title=message_str))
-        await message.delete(delay=5.0)
+        self.deleter.schedule(message, 5.0)
 
     async def _clearQueue(self, ctx):
         """
-        Discord server members can clear the PlayerQueue with this command."""
-        for player in self.q:
+        Discord server members can clear the PlayerQueue with this command. Players seated at a running table stay in the queue, with their bets, until their game ends."""
+        # take everyone out before awaiting any refunds, so players joining meanwhile aren't cleared too
+        removed = [self.q.pop(member_id) for member_id in list(self.q) if member_id not in self.tables.seated]
+        playing = len(self.q)
+        for player in removed:
             if player.bet > 0:
-                await self.economy.give_money_player(player.member, player.bet)
+                await self.economy.give_money_player(player.member, player.bet, "blackjack bet refund")
                 player.bet = 0
-            self.q.remove(player)
-            
-        message = await ctx.send(embed= Embed(title = f"All players have been removed from queue."))
-        await message.delete(delay=5.0)
+
+        if playing:
+            message = await ctx.send(embed= Embed(title = f"All players have been removed from queue, except the {playing} in a game right now."))
+        else:
+            message = await ctx.send(embed= Embed(title = f"All players have been removed from queue."))
+        self.deleter.schedule(message, 5.0)
 
     async def _showQueue(self, ctx):
         """
         This command provides users the ability to see who is currently in the PlayerQueue."""
         players_string = ""
-        for player in self.q:
+        for player in self.q.values():
             players_string += f"{player.name}\n"
         em = Embed(title="Players in Queue", description=f"{players_string}")
         await ctx.send(embed = em)
@@ -406,56 +587,57 @@ class PlayerQueue(Cog):
     
     async def _setBet(self, ctx, bet:int):
         """
-        Discord users who have joined the PlayerQueue can use this command to set a bet, valid for the next game of BlackJack.\n"""
+        Discord users who have joined the PlayerQueue can use this command to set a bet, valid for the next game of BlackJack.\n
+        Players can't change their bet while they're seated at a table, since the table pays out from it when the round ends."""
         bet = int(bet)
-        for player in self.q:
-            if ctx.author.name == player.name:
-                # store players bet amount in corresponding player object
-                withdraw_success = await self.economy.withdraw_money_player(ctx, ctx.author, bet)
-                player_balance = self.economy._get_balance(player.member)
-                if withdraw_success is False:
-                    broke_message = await ctx.send(embed = Embed(title=f"{ctx.author.name}, you're broke. Your current balance is {player_balance} GleepCoins."))
-                    await broke_message.delete(delay=10.0)
-                    return
-                player.bet = bet
-                message_str = f"{ctx.author.name} has placed a {bet} GleepCoin bet on the next BlackJack game, to win {int(bet) * 2} GC."
-                message = await ctx.send(embed = Embed(title=message_str))
-                await message.delete(delay=7.5)
+        if ctx.author.id in self.q and ctx.author.id in self.tables.seated:
+            message = await ctx.send(embed = Embed(title=f"{ctx.author.name}, you can't change your bet in the middle of a game."))
+            self.deleter.schedule(message, 5.0)
+            return
+        player = self.q.get(ctx.author.id)
+        if player is not None:
+            # store players bet amount in corresponding player object
+            withdraw_success = await self.economy.withdraw_money_player(ctx, ctx.author, bet, "blackjack bet")
+            if withdraw_success is False:
+                player_balance = await self.economy._get_balance(player.member)
+                broke_message = await ctx.send(embed = Embed(title=f"{ctx.author.name}, you're broke. Your current balance is {player_balance} GleepCoins."))
+                self.deleter.schedule(broke_message, 10.0)
                 return
+            player.bet = bet
+            message_str = f"{ctx.author.name} has placed a {bet} GleepCoin bet on the next BlackJack game, to win {int(bet) * 2} GC."
+            message = await ctx.send(embed = Embed(title=message_str))
+            self.deleter.schedule(message, 7.5)
+            return
         # otherwise, if player isn't in self.players ->
         message_str = f"You must join the queue before you can place a bet."
         message = await ctx.send(embed = Embed(title=message_str))
-        await message.delete(delay=7.5)
+        self.deleter.schedule(message, 7.5)
 
     async def _beg(self, ctx):
         """
         Players who have exhausted their bank account can use this command to make money."""
         amount = random.randint(1, 20)
-        await self.economy.give_money_player(ctx.author, amount)
+        await self.economy.give_money_player(ctx.author, amount, "begging")
         beg_message = await ctx.send(embed=Embed(title=f"{ctx.author.name} recieved {amount} GleepCoins from begging."))
-        await beg_message.delete(delay=5.0)
+        self.deleter.schedule(beg_message, 5.0)
 
     async def _playJack(self, ctx):
         """
-        This command is the PlayerQueue's interface with a blackjack game. It begins a game of blackjack, using all the players in the queue."""
+        This command is the PlayerQueue's interface with a blackjack game. It opens blackjack tables for all the players in the queue who aren't already playing."""
         await ctx.send(f"Attempting to start blackjack game.")
         try:
-            if not self.blackjack.in_progress:
-                await self.blackjack.play(ctx)
-            else:
-                await ctx.send("A blackjack game is already in progress.")
+            if await self.tables.openTables(ctx, BlackJackGame) == 0:
+                await ctx.send("Everyone in the queue is already playing. Join the queue to play at a new table.")
         except Exception as error:
             await ctx.send(f"An exception occured, {error}")
 
     async def _playPoker(self, ctx):
         """
-        This command puts all players in the PlayerQueue in a game of Texas Hold'em Poker."""
+        This command seats all players in the PlayerQueue who aren't already playing at Texas Hold'em Poker tables."""
         await ctx.send(f"Attempting to start Poker game.")
         try:
-            if not self.poker.in_progress:
-                await self.poker.play(ctx)
-            else:
-                await ctx.send("A poker game is already in progress.")
+            if await self.tables.openTables(ctx, Poker) == 0:
+                await ctx.send("There aren't 2 free players in the queue to open a poker table.")
         except Exception as e:
             await ctx.send(f"An exception occured, {e}")
 
@@ -464,7 +646,11 @@ class GamesController(Controller):
     """High level controller of PlayerQueues. Assigns each guild a PlayerQueue, and routes requests from guilds to their respective PlayerQueue instance."""
     def __init__(self, bot):
         super().__init__(bot, PlayerQueue)
-    
+        self.router = GameInputRouter.shared()
+
+    @commands.Cog.listener()
+    async def on_message(self, message) -> None:
+        self.router.dispatchMessage(message)
     
     @commands.command("joinQ")
     async def joinQueue(self, ctx) -> None:
@@ -514,7 +700,6 @@ class Dealer(Player):
         self.players = players
         self.cards_in_play = []
         self.hand = []
-        self.complete_hand:list[Card] = []
         self.winner = False
         self.tie = False
         self.bust = False
@@ -542,7 +727,6 @@ class Dealer(Player):
         Removes one card from this `Dealer`'s deck and puts that card in the `player`'s hand."""
         card = self.deck[0]
         player.hand.append(card)
-        player.complete_hand.append(card)
         self.cards_in_play.append(card)
         self.deck.remove(card)
 
@@ -586,15 +770,22 @@ class Dealer(Player):
 
 
 class BlackJackGame(Cog):
-    def __init__(self, bot:commands.Bot, player_queue:PlayerQueue):
+    """
+    One blackjack table. It plays a round for `players` in `channel`, which is either a text channel or a thread."""
+    def __init__(self, bot:commands.Bot, players:list[Player], channel:TextChannel | Thread):
         self.bot = bot
-        self.player_queue = player_queue.q
+        self.channel = channel
+        self.seated = list(players) # everyone dealt in at this table, self.players gains the dealer during a round
         self.players = []
-        self.economy = Economy(self.bot, get_db_connection("blackjack economy"))
+        self.economy = Economy(self.bot, get_async_db_connection("blackjack economy"))
+        self.router = GameInputRouter.shared()
+        self.deleter = DeletionScheduler.shared()
+        self.outbox = OutboundQueue.shared()
+        self.rest = RestScheduler.shared()
         self.in_progress = False
 
     def loadPlayers(self) -> None:
-        for player in self.player_queue:
+        for player in self.seated:
             if not player in self.players:
                 self.players.append(player)
 
@@ -614,18 +805,25 @@ class BlackJackGame(Cog):
     async def cashOut(self, ctx, players) -> None:
         """
         Method used to award players who didn't lose in the most recent hand of blackjack."""
+        payouts = {}
+        for player in players:
+            if player.bet <= 0:
+                continue
+            if player.winner:
+                payouts[player.member] = player.bet * 2
+            elif player.tie:
+                payouts[player.member] = player.bet
+        if not await self.economy.settle(payouts, "blackjack payout"):
+            self.outbox.send(ctx, Embed(title="Couldn't pay out this round.", description="The bank didn't take the payout, please let an admin know."))
+            return
         for player in players:
             if player.winner:
                 winnings = player.bet * 2
-                await self.economy.give_money_player(player.member, winnings)
                 if winnings != 0:
-                    message = await ctx.send(embed = Embed(title=f"{player.name} won {winnings} GleepCoins."))
-                    await message.delete(delay=5.0)
+                    self.outbox.send(ctx, Embed(title=f"{player.name} won {winnings} GleepCoins."), delete_after=5.0)
             elif player.tie:
                 winnings = player.bet
-                await self.economy.give_money_player(player.member, winnings)
-                message = await ctx.send(embed = Embed(title=f"{player.name} broke even, gaining back {winnings} GleepCoins."))
-                await message.delete(delay=5.0)
+                self.outbox.send(ctx, Embed(title=f"{player.name} broke even, gaining back {winnings} GleepCoins."), delete_after=5.0)
                     
     
 
@@ -667,9 +865,10 @@ class BlackJackGame(Cog):
         # now winners holds all our winners, tiebabies holds anyone who's tied
         return winners, tiebabies
 
-    async def play(self, ctx):
+    async def play(self):
         """
         Wrapper method to hold and execute all the BlackJack logic in a sequential order."""
+        channel = self.channel
         self.in_progress = True
         self.loadPlayers()
         self.resetPlayers()
@@ -679,34 +878,33 @@ class BlackJackGame(Cog):
         dealer = Dealer(deck, self.players)
         dealer.dealToSelf()
         dealer_shows = Embed(title=f"Dealer's Showing: {dealer.hand[0].face_value} of {dealer.hand[0].getSuitSymbol()}.")
-        dealer_hand_message = await ctx.send(embed = dealer_shows)
+        dealer_hand_message = await channel.send(embed = dealer_shows)
 
         # dealer now deals a hand to all players in player pool
         dealer.dealHands()
         for player in self.players:
-            your_turn_message = await ctx.send(embed = Embed(title = f"It's your turn, {player.name}!"))
+            your_turn_message = await self.rest.send(channel, Priority.INTERACTIVE, embed = Embed(title = f"It's your turn, {player.name}!"))
             # send a message to discord chat telling player it's their turn to go.
             while player.done != True:
                 try:
-                    em = Embed(title=f"Your total is {player.sumCards()}.", description="Do you want to hit? React with a ✅ for yes, or 🚫 for no.")
-                    input_message = await ctx.send(embed = em)
-                    await input_message.add_reaction("✅")
-                    await input_message.add_reaction("🚫")
-                    reaction, user = await self.bot.wait_for("reaction_add", timeout=15.0)
-                    if (user.name == player.name) and (reaction.emoji == "✅"):
+                    em = Embed(title=f"Your total is {player.sumCards()}.", description="Do you want to hit? Press ✅ for yes, or 🚫 for no.")
+                    prompt = ActionPrompt(player.member, {"✅": "Hit", "🚫": "Stand"}, timeout=15.0)
+                    input_message = await self.rest.send(channel, Priority.INTERACTIVE, embed = em, view = prompt)
+                    emoji, user = await prompt.waitForChoice()
+                    if emoji == "✅":
                         await input_message.delete()
                         dealer.dealCard(player)
                         if player.isBust():
                             player.done = True
-                            await ctx.send(f"You busted! Your total is {player.sumCards()}")
+                            await channel.send(f"You busted! Your total is {player.sumCards()}")
                         else: 
                             continue
-                    elif (user.name == player.name) and (reaction.emoji == "🚫"):
+                    elif emoji == "🚫":
                         await input_message.delete()
                         player.done = True
                         await your_turn_message.delete()
                 except asyncio.TimeoutError:
-                    await ctx.send("You took too long to react! Your turn is over.")
+                    await channel.send("You took too long to choose! Your turn is over.")
                     player.done = True
         #when all players are done with their turns
         self.players.append(dealer)
@@ -714,44 +912,95 @@ class BlackJackGame(Cog):
         await dealer_hand_message.edit(embed = Embed(title = f"Dealer's total is: {dealer.sumCards()}", description=f"The dealer's hand is: {dealer.prettyHand()}"))
 
         winners, ties = self.getWinners(self.players)
-        await self.cashOut(ctx, self.players)
+        await self.cashOut(channel, self.players)
         # if there are no winners, and no ties, send "Everyone lost."
         # else if there are winners, send "Here are our winners: "
         # else if there are no winners but there are ties, send "These players tied:"
         if (len(winners) == 0) and (len(ties) == 0):
-            await ctx.send(embed = Embed(title="You're All Losers!"))
+            self.outbox.send(channel, Embed(title="You're All Losers!"))
         elif len(winners) > 0:  
             winner_string = f"" 
             for winner in winners[:-1]:
                 winner_string += f"{winner.name}, "
             winner_string += f"{winners[-1].name}"
-            await ctx.send(embed = Embed(title=f"Our Winners are: {winner_string}"))
+            self.outbox.send(channel, Embed(title=f"Our Winners are: {winner_string}"))
         elif len(ties) > 0:
             tie_string = f"" 
             for tie in ties[:-1]:
                 tie_string += f"{tie.name}, "
             tie_string += f"{ties[-1].name}"
-            await ctx.send(embed = Embed(title=f"Our TieBabies are: {tie_string}"))
+            self.outbox.send(channel, Embed(title=f"Our TieBabies are: {tie_string}"))
             
-        await ctx.send("\nHere's everyone's hands.\n")
         long_ass_string = ""
         for player in self.players:
             long_ass_string += (f"{player.name} had: {player.prettyHand()}, with a total of {player.sumCards()}\n")
-        em = Embed(title="All Hands:", description = long_ass_string)
-        await ctx.send(embed = em)
+        em = Embed(title="Here's everyone's hands:", description = long_ass_string)
+        self.outbox.send(channel, em)
+        # the round's results go out together, and before anything the next round sends
+        await self.outbox.flush(channel)
         self.in_progress = False
         # empty players before giving opportunity for another round to start
 
 
+class ChipLedger:
+    """
+    Tracks the chips at one poker table in memory, so betting never waits on the bank.\n
+    Each player buys in their stack once when a hand starts, bets move chips from their stack into the pot, and the whole table is written back to the bank in one settlement when the hand ends or is aborted."""
+    def __init__(self):
+        self.members:dict[int, Member] = {} # member id : Member
+        self.stacks:dict[int, int] = {} # member id : chips left in front of the player
+        self.committed:dict[int, int] = {} # member id : chips the player has put into the pot this hand
+
+    def isOpen(self) -> bool:
+        return len(self.members) > 0
+
+    def buyIn(self, member:Member, amount:int) -> None:
+        self.members[member.id] = member
+        self.stacks[member.id] = self.stacks.get(member.id, 0) + int(amount)
+        self.committed.setdefault(member.id, 0)
+
+    def getStack(self, member:Member) -> int:
+        return self.stacks.get(member.id, 0)
+
+    def bet(self, member:Member, amount:int) -> bool:
+        """Moves `amount` from the player's stack into the pot. Returns False if the player can't cover it."""
+        amount = int(amount)
+        if amount < 0 or self.stacks.get(member.id, 0) < amount:
+            return False
+        self.stacks[member.id] -= amount
+        self.committed[member.id] += amount
+        return True
+
+    def award(self, member:Member, amount:int) -> None:
+        self.stacks[member.id] = self.stacks.get(member.id, 0) + int(amount)
+
+    def _payouts(self, amounts:dict[int, int]) -> dict[Member, int]:
+        return {self.members[member_id]: amount for member_id, amount in amounts.items() if amount != 0}
+
+    def cashOut(self) -> dict[Member, int]:
+        """Returns what each player walks away with after a finished hand. The table stays open until close() is called."""
+        return self._payouts(dict(self.stacks))
+
+    def refund(self) -> dict[Member, int]:
+        """Returns every player's stack plus whatever they put in the pot, for an aborted hand. The table stays open until close() is called."""
+        return self._payouts({member_id: stack + self.committed.get(member_id, 0) for member_id, stack in self.stacks.items()})
+
+    def close(self) -> None:
+        """Forgets the table once its payouts have been settled with the bank."""
+        self.members.clear()
+        self.stacks.clear()
+        self.committed.clear()
+
+
 class Poker(commands.Cog):
     """
-    The Poker class stores the sequential steps necessary for carrying out a game of texas hold'em poker. The logic used to evaluate which hand is the winner in a game of Poker, is all stored in the PokerRanker class.
+    The Poker class stores the sequential steps necessary for carrying out a game of texas hold'em poker. Hands are scored at showdown by the HandEvaluator class.
     
     attributes required for construction:
     :discord.ext.commands.Bot bot: A discord Bot object, used to communicate with Discord servers.
     :Deck deck: A Deck object representing two decks to be used in a poker game.
-    :PlayerQueue player_queue: A PlayerQueue object which is used to access the players who are in the game.
-    :list players: The list that becomes populated with any players in the game whenever a Poker game is constructed.
+    :list players: The players seated at this table. Players who fold are removed from it during the hand.
+    :TextChannel | Thread channel: Where this table's game is played.
     :Dealer dealer: A Dealer is used to deal cards to the community and to the rest of the players in the Poker game.
     
     attributes instantiated upon construction:
@@ -763,6 +1012,7 @@ class Poker(commands.Cog):
     :dict[str, discord.Thread] threads: A dictionary used to store private threads for each player in the game. These threads are used to privately send players their poker hand.\n
     :int pot: Represents the pot of chips to be won in a game of Poker.\n
     :bool earlyFinish: A boolean used to control state of poker game - becomes True if only one player remains in the game before betting rounds have finished.\n
+    :ChipLedger chips: The players' chip stacks for the current hand. Bets are taken from here instead of the bank.\n
     """
     HANDS_TO_RANKS = {
         "royal flush": 0,
@@ -790,18 +1040,21 @@ class Poker(commands.Cog):
         9: "high card",
     }
 
-    def __init__(self, bot, player_queue:PlayerQueue):
+    def __init__(self, bot, players:list[Player], channel:TextChannel | Thread):
         self.bot = bot
         self.deck = Deck("poker")
         self.deck.shuffle()
-        self.player_queue = player_queue
-        self.guild = self.player_queue.guild
-        self.players:list[Player] = []
-        for player in self.player_queue.q:
-            self.players.append(player)
+        self.channel = channel
+        self.guild = channel.guild
+        self.seated = list(players) # everyone dealt in at this table, including players who fold
+        self.players:list[Player] = list(players)
         self.dealer = Dealer(self.deck, self.players)
-        self.economy = Economy(self.bot, get_db_connection("Poker-economy"))
-        self.db_connection = get_db_connection("Poker game") 
+        self.economy = Economy(self.bot, get_async_db_connection("Poker-economy"))
+        self.db_connection = get_async_db_connection("Poker game")
+        self.router = GameInputRouter.shared()
+        self.deleter = DeletionScheduler.shared()
+        self.outbox = OutboundQueue.shared()
+        self.rest = RestScheduler.shared()
         
         # poker specific attributes 
         self.community_cards:list[Card] = []
@@ -809,10 +1062,32 @@ class Poker(commands.Cog):
         self.big_blind = 0
         self.small_blind_idx = None
         self.big_blind_idx = 0
-        self.threads:dict[str, str] = {} # contains player names as keys, and discord.Thread IDs as values - used to send private messages to players
+        self.threads:dict[str, str] = {} # contains player ids as keys, and discord.Thread IDs as values - used to send private messages to players
         self.pot = 0 # holds all bets
+        self.chips = ChipLedger()
         self.early_finish = False # responsible for state of whether a game has ended early (due to all but 1 player folding)
         self.in_progress = False
+        self.stage = "Waiting for blinds"
+        self.turn:Player | None = None # player the table is waiting on
+        self.display = TableDisplay(channel, self.renderTable)
+
+    def renderTable(self) -> Embed:
+        """
+        Builds the table's live embed: the board, the pot, every seated player's stack, whose turn it is, and the latest actions."""
+        em = Embed(title=f"Poker Table - {self.stage}")
+        board = " ".join(card.stringify() for card in self.community_cards)
+        em.add_field(name="Board", value=board or "No cards yet.", inline=False)
+        em.add_field(name="Pot", value=f"{self.pot} GleepCoins", inline=False)
+        seats = ""
+        for player in self.seated:
+            marker = "👉 " if player is self.turn else ""
+            status = " (folded)" if player not in self.players else ""
+            button = " 🔘" if player.button else ""
+            seats += f"{marker}{player.name}{button}: {self.chips.getStack(player.member)} GleepCoins{status}\n"
+        em.add_field(name="Players", value=seats or "Nobody's seated.", inline=False)
+        if self.display.events:
+            em.add_field(name="Latest", value="\n".join(self.display.events), inline=False)
+        return em
 
     async def resetPlayers(self) -> None:
         """
@@ -821,23 +1096,42 @@ class Poker(commands.Cog):
             if player.name == "Dealer":
                 self.players.remove(player)
         if self.players:
+            betting = []
             for player in self.players:
                 player.winner = False
                 player.done = False
                 player.hand = []
                 player.ranked_hand.clear()
-                player.complete_hand.clear()
-                player.possible_hands.clear()
+                player.hand_value = 7463
                 player.button = False
                 player.thread = None
                 player.folded = False
+                # the queue's Player objects are shared with blackjack, so a bet here was already taken from the bank by $setBet
                 if player.bet > 0:
-                    await self.economy.give_money_player(player.member, player.bet)
+                    betting.append(player)
+            if betting:
+                if not await self.economy.settle({player.member: player.bet for player in betting}, "blackjack bet refund"):
+                    # the bets stay on the players, so leaving the queue can still refund them
+                    raise RuntimeError("couldn't refund the blackjack bets of players at this table, so the hand wasn't started")
+                for player in betting:
                     player.bet = 0
+        if self.chips.isOpen():
+            # a previous hand never closed its table
+            if not await self.economy.settle(self.chips.refund(), "poker refund"):
+                raise RuntimeError("couldn't refund the chips left on this table from the last hand, so the hand wasn't started")
+            self.chips.close()
+
+    async def buyIn(self) -> None:
+        """
+        Moves each player's stake for this hand, up to POKER_MAX_BUY_IN, out of the bank and onto the table.\n
+        The rest of their balance stays in the bank, where other games can still use it."""
+        for player in self.players:
+            self.chips.buyIn(player.member, await self.economy.buy_in(player.member, POKER_MAX_BUY_IN, "poker buy-in"))
 
     def getPlayers(self) -> None:
-        """Retrieves the list of Players from the PlayerQueue, storing them in self.players."""
-        self.players = self.player_queue.q
+        """Seats every player dealt in at this table, storing them in self.players."""
+        self.players = list(self.seated)
+        self.dealer.players = self.players
 
     def getPot(self) -> int:
         """
@@ -866,19 +1160,19 @@ class Poker(commands.Cog):
                 return False
         return True
 
-    def getThreads(self) -> None:
+    async def getThreads(self) -> None:
         """
         Stores any previously used discord threads in memory for sending poker hands to players during the upcoming game of Poker.
         """
-        self.threads = self.db_connection.get_guild_threads(self.guild)
+        self.threads = await self.db_connection.get_guild_threads(str(self.guild.id))
         return
 
-    def writeNewThread(self, player, thread_id:str, guild_id:str) -> None:
+    async def writeNewThread(self, player, thread_id:str, guild_id:str) -> None:
         """
         Writes a user and their discord thread identifier, in this specific guild, to the threads.csv file.
         """
         # when writing a new thread, we need to record the member.name, the thread_id, and the current guild (self.guild)
-        self.db_connection.add_thread_id_if_none(player.name, str(thread_id), str(guild_id))
+        await self.db_connection.add_thread_id_if_none(str(player.member.id), str(thread_id), str(guild_id))
     
     def setPlayersNotDone(self, players:list[Player]) -> None:
         """
@@ -887,16 +1181,14 @@ class Poker(commands.Cog):
             player.done = False
 
     async def set_bet(self, ctx, inputPlayer:Player, bet:int):
-        """Withdraws 'bet' from given inputPlayer's gleepcoins bank account."""
+        """Takes 'bet' from given inputPlayer's chip stack at this table."""
         bet = int(bet)
         success = False
         for player in self.players:
-            if inputPlayer.name == player.name:
-                try:
-                    success = await self.economy.withdraw_money_player(ctx, inputPlayer.member, bet)
+            if inputPlayer.member.id == player.member.id:
+                success = self.chips.bet(inputPlayer.member, bet)
+                if success:
                     player.bet = bet
-                except Exception as e:
-                    print(f"Error setting bet for player, {player.name} : {e}")
         return success
 
     async def showAllHands(self, ctx) -> None:
@@ -905,7 +1197,7 @@ class Poker(commands.Cog):
         all_hands = ""
         for player in self.players:
             all_hands += f"{player.name}: {player.prettyHand()}\n"
-        await ctx.send(embed=Embed(title=f"Everyone's Hand", description=all_hands))
+        self.outbox.send(ctx, Embed(title=f"Everyone's Hand", description=all_hands))
 
     async def showHands(self):
         """
@@ -914,18 +1206,18 @@ class Poker(commands.Cog):
         """
         channel = await self.getPokerChannel()
         for player in self.players:
-            member = [user for user in self.player_queue.q if user.name == player.name][0].member
-            if not player.name in self.threads:
+            member = player.member
+            if not str(player.member.id) in self.threads:
                 # print(f"creating thread for {player.name}")
                 thread = await channel.create_thread(name="Your Poker Hand", reason = "poker hand", auto_archive_duration = 60)
-                self.threads[player.name] = str(thread.id)
-                self.writeNewThread(player, str(thread.id), self.guild.id)
+                self.threads[str(player.member.id)] = str(thread.id)
+                await self.writeNewThread(player, str(thread.id), self.guild.id)
                 # need to invite player's Member object to thread
                 await thread.send(embed = Embed(title="Your Hand", description=f"{player.prettyHand()}\n{member.mention}"))
                 await thread.add_user(member)
-            elif player.name in self.threads:
+            elif str(player.member.id) in self.threads:
                 # print(f"using thread for {player.name}")
-                thread_id = self.threads[player.name]
+                thread_id = self.threads[str(player.member.id)]
                 # print(f"Thread id: {thread_id}")
                 thread = await self.guild.fetch_channel(thread_id)
                 # print(f"thread type: {type(thread)}")
@@ -945,21 +1237,18 @@ class Poker(commands.Cog):
 
     async def getPokerChannel(self) -> TextChannel:
         """
-        Returns text channel named "poker" in your Discord server where the bot will send poker related messages, necesary to run the game.\n"""
-        async for guild in self.bot.fetch_guilds():
-            if guild.name == "Orlando Come":
-                self.guild = guild
-                channels = await guild.fetch_channels()
-                for channel in channels:
-                    if channel.name == "poker":
-                        return channel
-        raise Exception("Your guild isn't named Orlando Come, or you don't have a text channel named poker. Please change this code Parker to be more easy to use for other people. Perhaps create a new channel named poker and then access that one after its created.")
+        Returns the text channel this table plays in, where players' private hand threads are created.\n
+        Tables that play in a thread use the thread's parent channel, since threads can't hold threads of their own."""
+        if isinstance(self.channel, Thread):
+            return self.channel.parent
+        return self.channel
     
     async def sendPotMessage(self, ctx) -> None:
-        await ctx.send(embed=Embed(title=f"Current Pot: {self.pot} GleepCoins"))
+        """Shows the current pot on the table display."""
+        self.display.update()
 
     async def sendBrokeMessage(self, ctx, player:Player, economy:Economy) -> None:
-        await ctx.send(embed=Embed(title=f"Get ya money up, not ya funny up.", description=f"Transaction failed, {player.name}. Maybe it's because you only got {economy._get_balance(player.member)}.\nTry again, with a lower amount, or you might have to fold."))
+        await ctx.send(embed=Embed(title=f"Get ya money up, not ya funny up.", description=f"Transaction failed, {player.name}. Maybe it's because you only got {self.chips.getStack(player.member)} at the table.\nTry again, with a lower amount, or you might have to fold."))
 
     # currently having an issue that the pot is raised much higher than it should after assigning big blind.
     async def assignButtonAndPostBlinds(self, ctx):
@@ -971,8 +1260,6 @@ class Poker(commands.Cog):
             await ctx.send(f"You don't have enough players to play Poker. You need 2 or more players.")
         i = random.randint(0, num_players-1)
         self.players[i].button = True
-        button_msg = await ctx.send(embed=Embed(title=f"{self.players[i].name} holds the button this round."))
-        await button_msg.delete(delay=10.0)
         if i == num_players - 1:
             self.small_blind_idx = 0
             self.big_blind_idx = 1
@@ -984,11 +1271,13 @@ class Poker(commands.Cog):
             self.big_blind_idx = i + 2
         small_blind_player = self.players[self.small_blind_idx]
         big_blind_player = self.players[self.big_blind_idx]
-        await ctx.send(embed=Embed(title=f"Game Info: ", description= f"{self.players[i].name} holds the button this game.\n{small_blind_player.name} will set the small blind,\nand {big_blind_player.name} will set the big blind."))
-        input_message = await ctx.send(embed = Embed(title=f"Post the small blind, {small_blind_player.name}.", description=f"{small_blind_player.name}, type the amount of GleepCoins to set as small blind."))
+        self.display.log(f"{self.players[i].name} holds the button. {small_blind_player.name} sets the small blind and {big_blind_player.name} sets the big blind.")
+        self.turn = small_blind_player
+        await self.display.flush()
+        input_message = await self.rest.send(ctx, Priority.INTERACTIVE, embed = Embed(title=f"Post the small blind, {small_blind_player.name}.", description=f"{small_blind_player.name}, type the amount of GleepCoins to set as small blind."))
         while self.small_blind == 0:
-            message = await self.bot.wait_for("message", timeout = None)
-            if message.author.name == small_blind_player.name:
+            message = await self.router.waitForMessage(ctx, small_blind_player.member)
+            if message.author.id == small_blind_player.member.id:
                 try:
                     small_blind = int(message.content)
                     is_success = await self.set_bet(ctx, small_blind_player, small_blind)
@@ -996,41 +1285,44 @@ class Poker(commands.Cog):
                     if is_success is True:
                         self.small_blind = small_blind
                         self.pushToPot(small_blind_player)
-                        await ctx.send(embed = Embed(title=f"Small blind posted at {small_blind} GleepCoins."))
+                        self.display.log(f"{small_blind_player.name} posted the small blind, {small_blind} GleepCoins.")
+                    else:
+                        await self.sendBrokeMessage(ctx, small_blind_player, self.economy)
                 except ValueError or TypeError:
                     error_message = await ctx.send(embed=Embed(title="Please type a valid number."))
-                    await error_message.delete(delay=7.0)
-        await input_message.delete(delay=15.0)
-        big_message = await ctx.send(embed=Embed(title=f"Post the big blind, {big_blind_player.name}."))
+                    self.deleter.schedule(error_message, 7.0)
+        self.deleter.schedule(input_message, 15.0)
+        self.turn = big_blind_player
+        big_message = await self.rest.send(ctx, Priority.INTERACTIVE, embed=Embed(title=f"Post the big blind, {big_blind_player.name}."))
         while self.big_blind == 0:
-            big_message = await self.bot.wait_for("message", timeout = None)
-            if big_message.author.name == big_blind_player.name:
+            big_message = await self.router.waitForMessage(ctx, big_blind_player.member)
+            if big_message.author.id == big_blind_player.member.id:
                 try:
                     big_blind = int(big_message.content)
                     if big_blind <= self.small_blind:
                         error_msg = await ctx.send(embed=Embed(title=f"Big blind must be larger than small blind. Please type a number larger than {self.small_blind}."))
-                        await error_msg.delete(delay = 7.0)
+                        self.deleter.schedule(error_msg, 7.0)
                     elif big_blind > self.small_blind:
                         success = await self.set_bet(ctx, big_blind_player, big_blind)
                         if success is True:
                             self.big_blind = big_blind
                             self.min_bet = self.big_blind
-                            big_blind_alert = await ctx.send(embed = Embed(title=f"Big blind posted at {big_blind} GleepCoins."))
                             self.pushToPot(big_blind_player)
-                            await big_blind_alert.delete(delay = 7.0)
+                            self.display.log(f"{big_blind_player.name} posted the big blind, {big_blind} GleepCoins.")
                         else:
-                            balance = self.economy._get_balance(big_blind_player.member)
-                            await ctx.send(embed = Embed(title=f"Your transaction failed.", description=f"{big_blind_player.name}, your balance is {balance}"))
+                            balance = self.chips.getStack(big_blind_player.member)
+                            await ctx.send(embed = Embed(title=f"Your transaction failed.", description=f"{big_blind_player.name}, your stack is {balance}"))
                             continue
                 except ValueError or TypeError:
                     int_error = await ctx.send(embed = Embed(title=f"Please type a valid integer."))
-                    await int_error.delete(delay = 7.0)
+                    self.deleter.schedule(int_error, 7.0)
                     continue
         return
 
     # need to push players bets to pot after each raise, call, or fold.
     async def takePreFlopBets(self, ctx):
         if self.early_finish is not True:
+            self.stage = "Pre-Flop Betting"
             self.setPlayersNotDone(self.players)
             max_idx = len(self.players)
             initial_bet = self.big_blind
@@ -1042,28 +1334,27 @@ class Poker(commands.Cog):
                     player_idx = player_idx % max_idx 
 
                 player = self.players[player_idx]
-                member = [user for user in self.player_queue.q if user.name == player.name][0].member
+                member = player.member
                 
                 if player.bet < min_bet:
                     player.done = False
                 
                 message_embed = Embed(title=f"Pre-Flop Betting", description=f"{member.mention}\nWould you like to call {min_bet} 📞, raise 🆙, or fold 🏃‍♂️?")
                 # 📞 call emoji, 🏃‍♂️ fold emoji, 🆙 raise emoji
+                if player.done != True:
+                    self.turn = player
+                    self.display.update()
                 while player.done != True:
-                    input_message = await ctx.send(embed=message_embed)
-                    await input_message.add_reaction("📞")
-                    await input_message.add_reaction("🆙")
-                    await input_message.add_reaction("🏃‍♂️")
+                    prompt = ActionPrompt(member, {"📞": "Call", "🆙": "Raise", "🏃‍♂️": "Fold"}, timeout=60.0)
+                    input_message = await self.rest.send(ctx, Priority.INTERACTIVE, embed=message_embed, view=prompt)
                     try:
-                        reaction, user = await self.bot.wait_for("reaction_add", timeout=60.0)
-                        emoji = reaction.emoji
-                        if (user.name == player.name):
+                        emoji, user = await prompt.waitForChoice()
+                        if (user.id == player.member.id):
                             match emoji:
                                 case "📞":
                                     isSuccess = await self.set_bet(ctx, player, min_bet)
                                     if isSuccess:
-                                        call_msg = await ctx.send(embed=Embed(title=f"{player.name} called the bet, {min_bet} GleepCoins."))
-                                        await call_msg.delete(delay=5.0)
+                                        self.display.log(f"{player.name} called {min_bet} GleepCoins.")
                                         player.done = True
                                         self.pushToPot(player)
                                     else:
@@ -1072,15 +1363,16 @@ class Poker(commands.Cog):
 
                                 case "🆙":
                                     await ctx.send(embed=Embed(title=f"Okay, set a bet higher than {min_bet}.", description=f"Please type your bet to raise."))
-                                    raise_message = await self.bot.wait_for("message")
+                                    # timing out folds the player, the same as not pressing a button
+                                    raise_message = await self.router.waitForMessage(ctx, player.member, timeout=60.0)
                                     try:
                                         raise_amount = int(raise_message.content)
                                         if raise_amount <= min_bet:
-                                            await ctx.send(embed=Embed(title=f"That bet was too small. Please react and try again."))
+                                            await ctx.send(embed=Embed(title=f"That bet was too small. Please choose again."))
                                         else:
                                             isSuccess = await self.set_bet(ctx, player, raise_amount)
                                             if isSuccess:
-                                                await ctx.send(embed=Embed(title=f"{player.name} raised {raise_amount} GleepCoins."))
+                                                self.display.log(f"{player.name} raised to {raise_amount} GleepCoins.")
                                                 self.pushToPot(player)
                                                 self.setPlayersNotDone(self.players)
                                                 min_bet = raise_amount
@@ -1091,12 +1383,11 @@ class Poker(commands.Cog):
 
                                     except ValueError as e:
                                         print(f"Error casting your message to integer:", e)
-                                        await ctx.send(f"That was an invalid integer. Please react and then try again.")
+                                        await ctx.send(f"That was an invalid integer. Please choose again.")
                                         continue
                                 case "🏃‍♂️":
                                     # in a fold, mans doesnt place a bet, he just is done betting, and leaves the active players.
-                                    leave_message = await ctx.send(embed=Embed(title=f"{player.name} folded.", description=f"You forfeited {player.bet} GleepCoins to the pot."))
-                                    await leave_message.delete(delay=5.0)
+                                    self.display.log(f"{player.name} folded.")
                                     self.pushToPot(player)
                                     self.players.remove(player)
                                     max_idx -= 1
@@ -1107,25 +1398,26 @@ class Poker(commands.Cog):
                         self.players.remove(player)
                         max_idx -= 1
                         player.done = True
-                        await ctx.send(embed=Embed(title=f"You took too long, dummy (baltimore accent).", description=f"You automatically folded."))  
+                        self.display.log(f"{player.name} took too long, dummy (baltimore accent), and automatically folded.")
                 
                 await self.sendPotMessage(ctx) # show the pot at the end of each player's turn  
                 if (len(self.players) == 1):
                     self.players[0].winner = True
-                    await ctx.send(embed=Embed(title=f"{self.players[0].name} is the last player standing.", description=f"{self.players[0].name} will receive the pot of {self.pot} GleepCoins."))
+                    self.display.log(f"{self.players[0].name} is the last player standing, and will receive the pot of {self.pot} GleepCoins.")
                     self.early_finish = True    
 
                 if self.areAllPlayersDone():
                     break
 
-            pf_msg = await ctx.send(embed=Embed(title=f"Pre flop betting has come to an end.", description=f"Current Pot: {self.pot} GleepCoins."))
-            await pf_msg.delete(delay=10.0)
+            self.turn = None
+            self.display.log("Pre flop betting has come to an end.")
             return
         else:
             return
         
     async def takePostFlopBets(self, ctx, name_of_betting_round):
         if self.early_finish is not True:
+            self.stage = f"{name_of_betting_round.capitalize()} Betting"
             self.setPlayersNotDone(self.players)
             max_idx = len(self.players)
             min_bet = 0
@@ -1139,7 +1431,7 @@ class Poker(commands.Cog):
                     player_idx = player_idx % max_idx 
 
                 player = self.players[player_idx]
-                member = [user for user in self.player_queue.q if user.name == player.name][0].member
+                member = player.member
                 
                 if player.bet < min_bet:
                     player.done = False
@@ -1150,18 +1442,19 @@ class Poker(commands.Cog):
                 
 
                 # 📞 call emoji, 🏃‍♂️ fold emoji, 🆙 raise emoji, ✔️ check emoji
+                if player.done != True:
+                    self.turn = player
+                    self.display.update()
                 while player.done != True:
                     
-                    input_message = await ctx.send(embed=message_embed)
-                    await input_message.add_reaction("🆙")
-                    await input_message.add_reaction("✔️")
-                    await input_message.add_reaction("🏃‍♂️")
+                    actions = {"🆙": "Raise" if min_bet > 0 else "Bet", "✔️": "Check", "🏃‍♂️": "Fold"}
                     if (min_bet > 0):
-                        await input_message.add_reaction("📞")
+                        actions["📞"] = "Call"
+                    prompt = ActionPrompt(member, actions, timeout=60.0)
+                    input_message = await self.rest.send(ctx, Priority.INTERACTIVE, embed=message_embed, view=prompt)
                     try:
-                        reaction, user = await self.bot.wait_for("reaction_add", timeout=60.0)
-                        emoji = reaction.emoji
-                        if (user.name == player.name):
+                        emoji, user = await prompt.waitForChoice()
+                        if (user.id == player.member.id):
                             # if min bet is 0 : players can raise, check, or fold, but not call
                             # if min bet is > 0: players can call, raise, or fold. can't check
                             # min bet should be renamed min_bet_for_the_current_rotation - bets should continue until a round has passed where everyone has checked.
@@ -1174,7 +1467,7 @@ class Poker(commands.Cog):
                                     if min_bet > 0:
                                         isSuccess = await self.set_bet(ctx, player, min_bet)
                                         if isSuccess:
-                                            await ctx.send(embed=Embed(title=f"{player.name} called the bet, {min_bet} GleepCoins."))
+                                            self.display.log(f"{player.name} called {min_bet} GleepCoins.")
                                             self.pushToPot(player)
                                             player.done = True
                                         else:
@@ -1185,15 +1478,15 @@ class Poker(commands.Cog):
 
                                 case "🆙":
                                     await ctx.send(embed=Embed(title=f"Okay, set a bet higher than {min_bet}.", description=f"Please type your bet to raise."))
-                                    raise_message = await self.bot.wait_for("message")
+                                    raise_message = await self.router.waitForMessage(ctx, player.member, timeout=60.0)
                                     try:
                                         raise_amount = int(raise_message.content)
                                         if raise_amount <= min_bet:
-                                            await ctx.send(embed=Embed(title=f"That bet was too small. Please react and try again."))
+                                            await ctx.send(embed=Embed(title=f"That bet was too small. Please choose again."))
                                         else:
                                             isSuccess = await self.set_bet(ctx, player, raise_amount) 
                                             if isSuccess:
-                                                await ctx.send(embed=Embed(title=f"{player.name} raised {raise_amount}."))
+                                                self.display.log(f"{player.name} raised to {raise_amount} GleepCoins.")
                                                 self.pushToPot(player)
                                                 min_bet = raise_amount
                                                 player.done = True
@@ -1205,14 +1498,13 @@ class Poker(commands.Cog):
                                                 continue
                                     except ValueError as e:
                                         print(f"Error casting your message to integer:", e)
-                                        await ctx.send(f"That was an invalid integer. Please react and then try again.")
+                                        await ctx.send(f"That was an invalid integer. Please choose again.")
                                         continue
                                 case "✔️":
                                     # a player can only check if the min bet is 0, otherwise they must call or fold
                                     if min_bet == 0:
                                         player.done = True
-                                        check_msg = await ctx.send(embed=Embed(title=f"{player.name} checked."))
-                                        await check_msg.delete(delay=7.0)
+                                        self.display.log(f"{player.name} checked.")
                                     else:
                                         await ctx.send(embed=Embed(title=f"You can't check right now.", description=f"You must call the raised bet, fold, or raise the raise."))
                                         continue
@@ -1221,8 +1513,7 @@ class Poker(commands.Cog):
                                     self.pushToPot(player)
                                     self.players.remove(player)
                                     max_idx -= 1
-                                    leave_message = await ctx.send(embed=Embed(title=f"{player.name} folded. Nice."))
-                                    await leave_message.delete(delay=5.0)
+                                    self.display.log(f"{player.name} folded. Nice.")
                                     player.done = True
 
                             await self.sendPotMessage(ctx)
@@ -1230,179 +1521,41 @@ class Poker(commands.Cog):
                         self.players.remove(player)
                         max_idx -= 1
                         player.done = True
-                        await ctx.send(embed=Embed(title=f"You took too long, dummy (baltimore accent).", description=f"You automatically folded."))  
+                        self.display.log(f"{player.name} took too long, dummy (baltimore accent), and automatically folded.")
                 if (len(self.players) == 1):
                     self.players[0].winner = True
-                    await ctx.send(embed=Embed(title=f"{self.players[0].name} is the last player standing."))
+                    self.display.log(f"{self.players[0].name} is the last player standing.")
                     self.early_finish = True    
 
                 if self.areAllPlayersDone():
                     break
 
-            pf_msg = await ctx.send(embed=Embed(title=f"Post flop betting has come to an end.", description = f"Current pot: {self.pot} GleepCoins."))
-            await pf_msg.delete(delay=10.0)
+            self.turn = None
+            self.display.log(f"{name_of_betting_round.capitalize()} betting has come to an end.")
             return
         else:
             return
 
-    def getHandRankAndPossibleHands(self, player:Player) -> int:
+    def rankHand(self, player:Player) -> int:
         """
-        Checks all possibilities for a player's hand, returns the best hand a player has in the form of an integer.\n
-        This integer corresponds to a key in the possible_hands dictionary.\n
-        Lower is better.
-        """
-        possible_scores = []
-        possible_hands:dict[int, list[Card]] = {
-            # 0: [], #royal flush [10, 11, 12, 13, 14]
-            # 1: [],
-            # 2: [],
-            # 3: [],
-            # 4: [],
-            # 5: [],
-            # 6: [],
-            # 7: [],
-            # 8: [],
-            # 9: [], # high card
-        }
-        ranker = PokerRanker
-        player.complete_hand = player.complete_hand + self.community_cards # add board to complete hand
-        player_hand = player.complete_hand # all 7 cards
-
-        Deck.bubbleSortCards(player_hand)
-        print(f"{player.name}'s complete, sorted hand: {[card.stringify() for card in player.complete_hand]}")
-
-        flushes = ranker.getFlushes(player_hand)
-        straights = ranker.getStraights(player_hand)
-        if (flushes is not None) and (straights is not None):
-            straight_flushes = ranker.getStraightFlushes(straights, flushes)
-            if straight_flushes is not None:
-                royal_flush = ranker.getRoyalFlush(straight_flushes)
-                if royal_flush is not None:
-                    rank = 0 # royal flush
-                    possible_scores.append(rank) 
-                    possible_hands[rank] = royal_flush
-                else:
-                    rank = 1 # straight flush
-                    possible_scores.append(rank) 
-                    possible_hands[rank] = ranker.getBestStraightFlush(straight_flushes)
-        elif straights is not None:
-            rank = 5 # straight
-            possible_scores.append(rank) 
-            possible_hands[rank] = ranker.getBestStraight(straights)
-        elif flushes is not None:
-            rank = 4 # flush
-            possible_scores.append(rank)
-            possible_hands[rank] = ranker.getBestFlush(flushes)
-        full_house = ranker.getFullHouse(player_hand)
-        if full_house is not None:
-            rank = 3 # full house
-            possible_scores.append(rank) 
-            possible_hands[rank] = full_house 
-
-        max_occurences = ranker.getMaxOccurences(player_hand)
-        if max_occurences <= 4:
-            match max_occurences:
-                case 4:
-                    rank = 2 # 4 of a kind
-                    player_hand = ranker.getNofAKind(max_occurences, player_hand)
-                case 3:
-                    rank = 6 # three of a kind.hand
-                    player_hand = ranker.getNofAKind(max_occurences, player_hand)
-                case 2: # if there's a max of 2 occurences, the hand could contain a solo pair OR a two pair
-                    two_pair = ranker.getTwoPair(player_hand)
-                    if two_pair is not None:
-                        rank = 7 # two pair
-                        player_hand = two_pair 
-                    else:
-                        rank = 8 # 2 of a kind
-                        player_hand = ranker.getBestPair(player_hand)
-                case _: 
-                    rank = 9 # high card
-                    player_hand = ranker.getHighCard(player.hand)
-            possible_scores.append(rank) 
-            possible_hands[rank] = player_hand
-        
-        player.possible_hands = possible_hands
-        return min(possible_scores)
-
-    def _getWinners(self, players:list[Player]) -> list[Player]:
-        """
-        Returns the winner or list of winners from the input players, in list format.
-        """
-        ranker = PokerRanker
-        best_rank = 15 #start lower than the worst score (higher scores are worse, 0 is the best possible)
-        interim_winners = []
-        winners = []
-        # get the best (lowest) score
-        for player in players:
-            if player.hand_rank < best_rank:
-                best_rank = player.hand_rank
-
-        # check if any two players share the best score
-        for player in players:
-            if player.hand_rank == best_rank:
-                interim_winners.append(player)
-            else:
-                players.remove(player)
-
-        # leaves only players who are tied with the best rank
-        if len(interim_winners) == 1:
-            winners = [interim_winners[0]]
-        
-        elif len(interim_winners) > 1:
-        # depending on what hand the players share, 
-            match best_rank:
-                case 0: # royal flush
-                    winners = interim_winners
-                case 1: # straight flush
-                    winners = ranker.breakStraightFlushTie(interim_winners)
-                case 2: # 4 of a kind
-                    winners = ranker.breakFOAKTie(interim_winners)
-                case 3: # full house
-                    winners = ranker.breakFullHouseTie(interim_winners)
-                case 4: # flush
-                    winners = ranker.breakFlushTie(interim_winners)
-                case 5: # straight
-                    winners = ranker.breakStraightTie(interim_winners)
-                case 6: # 3 of a kind
-                    winners = ranker.breakTripleTie(interim_winners)
-                case 7: # two pair
-                    winners = ranker.breakTwoPairTie(interim_winners)
-                case 8: # pair
-                    winners = ranker.breakPairTie(interim_winners)
-                case 9: # high card
-                    winners = ranker.breakHighCardTie(interim_winners)
-        
-        return winners
+        Scores a player's best hand out of their cards and the community cards, storing it on the player.\n
+        Returns the player's hand class from the HandEvaluator, lower is better."""
+        player.hand_value, player.ranked_hand = HandEvaluator.evaluate(player.hand + self.community_cards)
+        player.hand_rank = HandEvaluator.category(player.hand_value)
+        return player.hand_value
 
     async def getWinners(self) -> list[Player]:
         """
-        Wraps the method for evaluating a Poker winner into a pretty, concise form."""
-        final_winners = []
-        possible_hands = {
-            "royal flush": 0,
-            "straight flush": 1,
-            "four of a kind": 2,
-            "full house": 3,
-            "flush": 4,
-            "straight": 5,
-            "three of a kind": 6,
-            "two pair": 7,
-            "pair": 8, 
-            "high card": 9,
-        }
-        
-        if len(self.players) > 1:
-            for player in self.players:
-                player.hand_rank = self.getHandRankAndPossibleHands(player)
-            interim_winners = self._getWinners(self.players)
-            for winner in interim_winners:
-                final_winners.append(winner)
-
-        elif len(self.players) == 1:
-            final_winners.append(self.players[0])
-
-        return final_winners
+        Returns the players left in the hand who hold the best hand, more than one if they tie."""
+        if len(self.players) == 1:
+            winner = self.players[0]
+            if len(winner.hand) + len(self.community_cards) >= 5:
+                self.rankHand(winner) # so the winner's told what they were holding
+            return [winner]
+        if len(self.players) == 0:
+            return []
+        best_value = min(self.rankHand(player) for player in self.players)
+        return [player for player in self.players if player.hand_value == best_value]
 
     async def rewardWinners(self, ctx, winners) -> None:
         """
@@ -1418,858 +1571,202 @@ class Poker(commands.Cog):
             await ctx.send(f"The amount of winners was less than 1. Please fix this, bro")
 
         for winner in winners:
-            await self.economy.give_money_player(winner.member, cut)
-            await ctx.send(embed=Embed(title=f"Congratulations, {winner.name}! You won {cut} GleepCoins!", description=f"You had a {Poker.RANKS_TO_HANDS[winner.hand_rank]}."))
+            self.chips.award(winner.member, cut)
+        # stacks and winnings go back to the bank together
+        if not await self.economy.settle(self.chips.cashOut(), "poker cash-out"):
+            # take the winnings back off the table, so the refund in play() hands back exactly what everyone brought
+            for winner in winners:
+                self.chips.award(winner.member, -cut)
+            self.outbox.send(ctx, Embed(title="Couldn't pay out this hand.", description="Everyone's chips will be refunded instead."))
+            return
+        self.chips.close()
+        for winner in winners:
+            self.outbox.send(ctx, Embed(title=f"Congratulations, {winner.name}! You won {cut} GleepCoins!", description=f"You had a {Poker.RANKS_TO_HANDS[winner.hand_rank]}."))
 
     async def flop(self, ctx) -> None:
         """
-        Dealer of the game deals the flop, then bot sends a message containing the new community cards to the Poker channel."""
+        Dealer of the game deals the flop, then shows the new community cards on the table display."""
         self.dealer.dealFlop(self)
-        cards_string = self.getCommunityCardsString()
-        await ctx.send(embed=Embed(title=f"Community Cards", description = cards_string))
+        self.display.log("The flop is dealt.")
 
     async def dealCommunityCard(self, ctx) -> None:
         """
-        Method to deal one community card and send the community cards to the public Poker channel."""
+        Method to deal one community card and show the community cards on the table display."""
         if self.early_finish is not True:
             self.dealer.dealPokerCommunityCard(self)
-            cards_string = self.getCommunityCardsString()
-            await ctx.send(embed=Embed(title=f"Community Cards", description = cards_string))
+            self.display.log(f"{self.community_cards[-1].stringify()} is dealt.")
         else:
             return
     
-    async def play(self, ctx) -> None:
+    async def play(self) -> None:
         """
         Wraps up all the steps for playing a Poker game, and executes them in order."""
         # setup
+        channel = self.channel
         self.in_progress = True
-        await self.resetPlayers()
-        self.getThreads()
-        # retrieve all players at start of poker game
-        self.getPlayers()
-        # get playerqueue's players directly instead of storing players at 
-        if len(self.players) < 2:
-            await ctx.send(embed = Embed(title=f"You need at least 2 players to run a game of Poker. Please populate the PlayerQueue and try again."))
+        try:
+            await self.resetPlayers()
+            await self.getThreads()
+            # seat the table's players at the start of the poker game
+            self.getPlayers()
+            if len(self.players) < 2:
+                await channel.send(embed = Embed(title=f"You need at least 2 players to run a game of Poker. Please populate the PlayerQueue and try again."))
+                return
+            # every player's stack comes out of the bank once, bets stay in memory until the hand is over
+            await self.buyIn()
+
+            # scheduling each step in the right order, handling states when necessary
+            await asyncio.wait_for(self.assignButtonAndPostBlinds(channel), timeout=45.0)
+            self.dealer.dealHands()
+            await self.showHands()
+            await self.takePreFlopBets(channel)
+            await self.flop(channel)
+            self.setPlayersNotDone(self.players)
+            await self.takePostFlopBets(channel, "turn")
+            await self.dealCommunityCard(channel)
+            self.setPlayersNotDone(self.players)
+            await self.takePostFlopBets(channel, "river")
+            await self.dealCommunityCard(channel)
+            await self.showAllHands(channel)
+            # next, program logic for calculating winner
+            winners = await self.getWinners()
+            await self.rewardWinners(channel, winners)
+        finally:
+            if self.chips.isOpen():
+                # the hand was aborted before the winners were paid, give everyone their chips back
+                if await self.economy.settle(self.chips.refund(), "poker refund"):
+                    self.chips.close()
+                else:
+                    # the table stays open, so the next hand retries the refund before it starts
+                    self.outbox.send(channel, Embed(title="Couldn't refund this hand's chips.", description="They'll be refunded before the next hand starts."))
+            self.stage = "Hand over"
+            self.turn = None
+            await self.outbox.flush(channel)
+            await self.display.flush()
             self.in_progress = False
-            return
-        # turning each async function into a task
-        first_blind = self.assignButtonAndPostBlinds(ctx)
-        show_cards = self.showHands()
-        preflop_bets = self.takePreFlopBets(ctx)
-        flop = self.flop(ctx)
-        turn_bets = self.takePostFlopBets(ctx, "turn")
-        turn = self.dealCommunityCard(ctx)
-        river_bets = self.takePostFlopBets(ctx, "river")
-        river = self.dealCommunityCard(ctx)
-        hand_reveal = self.showAllHands(ctx)
-        determine_winner = self.getWinners()
-        self.in_progress = False
-       
-        
 
-        # scheduling each task in the right order, handling states when necessary
-        await asyncio.wait_for(first_blind, timeout=45.0)
-        self.dealer.dealHands()
-        await asyncio.wait_for(show_cards, timeout=None)
-        await asyncio.wait_for(preflop_bets, timeout=None)
-        await asyncio.wait_for(flop, timeout=None)
-        self.setPlayersNotDone(self.players)
-        await asyncio.wait_for(turn_bets, timeout=None)
-        await asyncio.wait_for(turn, timeout=None)
-        self.setPlayersNotDone(self.players)
-        await asyncio.wait_for(river_bets, timeout=None)
-        await asyncio.wait_for(river, timeout=None)
-        await asyncio.wait_for(hand_reveal, timeout=None)
-        # next, program logic for calculating winner
-        winners = await asyncio.wait_for(determine_winner, timeout=None)
-        reward_da_boys = self.rewardWinners(ctx, winners)
-        await asyncio.wait_for(reward_da_boys, timeout=None)
-
-
-class PokerRanker(Cog):
-    def __init__(self, bot):
-        self.bot = bot
-    
-    @staticmethod
-    def getHandTotalValue(player_hand:list[Card]) -> int:
-        """
-        Takes any length series of cards in a list, and returns the sum of their values.
-        """
-        total = 0
-        for card in player_hand:
-            total += card.pip_value
-        return total
-    
-    @staticmethod
-    def getFlushes(sorted_cards:list[Card]) -> list[list[Card]] | None:
-        """
-        Takes a sorted list consisting of both a player's hand and the community cards.\n
-        Returns all possible flushes in a given hand.
-        """
-        suits = {
-            # str, list[(value, suit), (value, suit)]
-            "♠": [],
-            "♣": [],
-            "♥": [],
-            "♦": [],
-        }
-        possible_flushes = []
-        for card in sorted_cards:
-            card_suit = card.getSuitSymbol()
-            suits[card_suit].append(card)
-        # now we have populated the suits dict with cards - we need to check if any of the suit lists contain 5 or items
-        for suit in suits:
-            while len(suits[suit]) > 5:
-                possible_flushes.append(suits[suit][-5:]) 
-                suits[suit].pop()
-            if len(suits[suit]) == 5:
-                possible_flushes.append(suits[suit])
-        if len(possible_flushes) > 0:
-            return possible_flushes
-        return None
-    
-    @staticmethod
-    def breakFlushTie(players:list[Player], length_of_remaining_cards = 5) -> list[Player]:
-        # in a flush tie, the winner is determined by who has the highest card in the flush
-        ranker = PokerRanker
-        rank = Poker.HANDS_TO_RANKS["flush"]
-        players_to_high_card = {
-            # player: 8,
-            # player2: 9,
-        }
-        # populate dict
-        for player in players:
-            flush = player.possible_hands[rank]
-            best_card = ranker.getHighCardVal(flush)
-            players_to_high_card[player] = best_card
-            for card in flush:
-                if card.pip_value == best_card:
-                    player.possible_hands[rank].remove(card)
-                    break
-        length_of_remaining_cards -= 1
-
-        #compare high cards
-        remaining_players = []
-        best_high_card = 0
-        for player in players_to_high_card:
-            high_card = players_to_high_card[player]
-            if high_card > best_high_card:
-                best_high_card = high_card
-                remaining_players.clear()
-                remaining_players.append(player)
-            elif high_card == best_high_card:
-                remaining_players.append(player)
-        
-        if (len(remaining_players) == 1) or (length_of_remaining_cards == 1):
-            return remaining_players
-        else:
-            return(ranker.breakFlushTie(remaining_players, length_of_remaining_cards))
-
-    @staticmethod
-    def getBestFlush(possible_flushes:list[list[Card]]) -> list[Card]:
-        best_flush = possible_flushes[0]
-        if len(possible_flushes) > 1:
-            for flush in possible_flushes:
-                # last card in flush has a higher num value than best flush last card, make best_flush the new flush
-                if PokerRanker.getHandTotalValue(flush) > PokerRanker.getHandTotalValue(best_flush):
-                    best_flush = flush
-        return best_flush
-
-    @staticmethod
-    def getStraights(sorted_cards:list[Card]) -> list[list[Card]]| None:
-        """
-        Returns a list of all possible straights in the given hand.\n
-        If no straights exist in the hand, returns None.
-        """
-        consecutive_cards:list[Card] = [] # list of Cards
-        first_card = sorted_cards[0]
-        consecutive_cards.append(first_card)
-        possible_straights:list[list[Card]] = []
-
-        # find any straights
-        for card in sorted_cards[1:]:
-            val = card.pip_value
-            most_recent_card_val = consecutive_cards[-1].pip_value # last card val in consecutive cards
-            if val == most_recent_card_val + 1:
-                consecutive_cards.append(card)
-            elif val != most_recent_card_val + 1:
-                # the current val is not one higher than most_recent_card_val in consec cards, start consec cards over with the current card
-                consecutive_cards = [card]
-
-            # check if we have a straight or not. 
-            if len(consecutive_cards) == 5:
-                possible_straights.append(consecutive_cards)
-            elif len(consecutive_cards) > 5:
-                possible_straights.append(consecutive_cards[-5:])
-
-        if len(possible_straights) > 0:
-            return possible_straights
-        return None
-    
-    @staticmethod
-    def breakStraightTie(players:list[Player], length_of_remaining_cards:int = 5) -> list[Player]:
-        ranker = PokerRanker
-        rank = Poker.HANDS_TO_RANKS["straight"]
-        players_to_highest_val = {
-            # player: 8,
-            # player2: 9,
-        }
-
-        # populate dict
-        for player in players:
-            straight = player.possible_hands[rank] # get player's best straight
-            player_high_card = ranker.getHighCardVal(straight)
-            players_to_highest_val[player] = player_high_card
-            for card in straight:
-                if card.pip_value == player_high_card:
-                    player.possible_hands[rank].remove(card)
-                    break
-        length_of_remaining_cards -= 1
-
-        #compare high cards
-        remaining_players = []
-        best_high_card = 0
-        for player in players_to_highest_val:
-            high_card = players_to_highest_val[player]
-            if high_card > best_high_card:
-                best_high_card = high_card
-                remaining_players.clear()
-                remaining_players.append(player)
-            elif high_card == best_high_card:
-                remaining_players.append(player)
-        
-        if (len(remaining_players) == 1) or (length_of_remaining_cards == 0):
-            return remaining_players
-        else:
-            return(ranker.breakStraightTie(remaining_players, length_of_remaining_cards))
-
-    @staticmethod
-    def getBestStraight(possible_straights:list[list[Card]]) -> list[Card]:
-        # (last possible straight will have highest value since the input cards are sorted)
-        return possible_straights[-1]
-
-    @staticmethod
-    def getStraightFlushes(possible_straights:list[list[Card]], possible_flushes:list[list[Card]]) -> list[list[Card]] | None:
-        # check if any of the straights also exist in flushes
-        possible_straight_flushes = []
-        # n^2 time complexity at least, since iteration increases exponentially as the size of input lists grow
-        for straight in possible_straights:
-            for flush in possible_flushes:
-                check = all(card in straight for card in flush)
-                if check is True:
-                    possible_straight_flushes.append(flush)
-
-        if len(possible_straight_flushes) > 0:
-            return possible_straight_flushes
-        return None
-
-    @staticmethod
-    def breakStraightFlushTie(players:list[Player]) -> list[Player]:
-        """
-        Compares an input list of player's straight flushes, returns the player(s) with the best one."""
-        ranker = PokerRanker
-        rank = Poker.HANDS_TO_RANKS["straight flush"]
-        hands_to_players = {}
-        hands_for_comparison = []
-        # the tie could potentially remain if the players have the same hand, so this method will return a list
-        best_players = []
-        # populate dict and hands for comparison 
-        for player in players:
-            best_hand = player.possible_hands[rank]
-            hands_to_players[best_hand] = player
-            hands_for_comparison.append(best_hand)
-        best_straight_flush = PokerRanker.getBestStraightFlush(hands_for_comparison)
-        # see how many people have the best hand
-        for straight_flush in hands_for_comparison:
-            if ranker.getHighCardVal(straight_flush) == ranker.getHighCardVal(best_straight_flush):
-                best_players.append(hands_to_players[straight_flush])
-
-        return best_players
-
-    @staticmethod
-    def getBestStraightFlush(possible_straight_flushes:list[list[Card]]) -> list[Card]:
-        ranker = PokerRanker
-        """
-        Possible straight flushes should be a list of 5 card combos (straight flushes)"""
-        best_one = possible_straight_flushes[0]
-        if len(possible_straight_flushes) > 1:
-            for flush in possible_straight_flushes:
-                if ranker.getHighCardVal(flush) > ranker.getHighCardVal(best_one):
-                    best_one = flush
-        return best_one
-
-    @staticmethod
-    def getRoyalFlush(straight_flushes:list[list[Card]]) -> list | None:
-        """
-        If hand contains a Royal Flush, returns the royal flush. Otherwise, returns None."""
-        royal_flush_key = [10, 11, 12, 13, 14]
-        # convert each straight flush to a list of its pip values
-        flush_num_values = []
-        for flush in straight_flushes:
-            pip_flush = [] 
-            for card in flush:
-                pip_flush = pip_flush + [card.pip_value]
-            flush_num_values.append(pip_flush)
-
-        # check if any of the straight flushes are royal flushes (they are already sorted)
-        for pip_flush in flush_num_values:
-            if pip_flush == royal_flush_key:
-                return pip_flush
-        return None
-
-    #FOAK = four of a kind
-    @staticmethod
-    def breakFOAKTie(players:list[Player]) -> list[Player]:
-        """
-        Compares the input players hands to find who has the best kicker in their hand. Returns player or players with the highest value kicker, in a list."""
-        rank = Poker.HANDS_TO_RANKS["four of a kind"]
-        ranker = PokerRanker
-        player_to_foak_value:dict[Player, int] = {
-            # player: 3, 
-            # player2: 6, 
-        }
-        best_foak_value = 0
-        
-        def getLeftovers(player:Player, player_foak_value:int):
-            """
-            Returns the player's complete hand with their four-of-a-kind cards removed."""
-            leftovers = player.complete_hand
-            for card in leftovers:
-                if card.pip_value == player_foak_value:
-                    leftovers.remove(card)
-            return leftovers
-
-        # populate dict and get best foak value
-        for player in players:
-            foak_value = player.possible_hands[rank][0].pip_value
-            player_to_foak_value[player] = foak_value
-            if foak_value > best_foak_value:
-                best_foak_value = foak_value
-        
-        # remove players who don't have best foak value
-        for player in players:
-            if player_to_foak_value[player] != best_foak_value:
-                del player_to_foak_value[player]
-        
-        # check length of remaining players, if more than one, get best kicker
-        remaining_players = len(player_to_foak_value)
-        if remaining_players > 1:
-            players_to_leftovers = {}
-            for player in player_to_foak_value:
-                players_to_leftovers[player] = getLeftovers(player, player_to_foak_value[player])
-            best_kickers = ranker.getBestKicker(players_to_leftovers, 1)
-            return best_kickers
-        elif remaining_players == 1:
-            return [player for player in player_to_foak_value] # should just be one player
-        else:
-            raise Exception("Boiiii how did you end up with 0 remaining players? FOAK")
-
-    
-    @staticmethod
-    def breakFullHouseTie(players:list[Player]) -> list[Player]:
-        rank = Poker.HANDS_TO_RANKS["full house"]
-        players_to_houses:dict[Player, list[int]] = {
-            # player : [value of triple, value of double]
-            # player : [3, 9],
-            # player2 : [7, 10],
-        }
-
-        # populate players_to_houses dict
-        for player in players:
-
-            full_house = player.possible_hands[rank]
-            if len(full_house) > 0:
-                # since triple is assigned to full_house before the double, 
-                # we can get the vallue of the triple cards by taking one of the first three cards value,
-                # and the pair's value from one of the last two cards.
-                # probably not safe, but I think it will work 
-                triple_value = full_house[0].pip_value 
-                dub_value = full_house[-1].pip_value
-                players_to_houses[player] = [triple_value, dub_value]
-            else:
-                continue
-        if len(players_to_houses) == 1:
-            return list(players_to_houses.keys())
-        
-        
-        # compare player's triples
-        players_with_best_triple = []
-        best_triple_value = 0
-        # get the best triple value, and store all players with that value
-        for player in players_to_houses:
-            player_trip_value = players_to_houses[player][0]
-            if player_trip_value > best_triple_value:
-                best_triple_value = player_trip_value
-                players_with_best_triple.clear()
-                players_with_best_triple.append(player)
-            elif player_trip_value == best_triple_value:
-                players_with_best_triple.append(player)
-        
-        # check if we need to continue, (to compare doubles) 
-        if len(players_with_best_triple) < 1:
-            raise Exception("Somehow, in this tie - no player was evaluated to have the best triple from a comparison of full houses.")
-        elif len(players_with_best_triple) == 1:
-            return players_with_best_triple
-        else: # we need to compare doubles
-            # find best double, store all players with best double
-            players_with_best_double = []
-            best_dub_value = 0
-            for player in players_to_houses:
-                player_dub_value = players_to_houses[player][1]
-                if player_dub_value > best_dub_value:
-                    best_dub_value = player_dub_value
-                    players_with_best_double.clear()
-                    players_with_best_double.append(player)
-                elif player_dub_value == best_dub_value:
-                    players_with_best_double.append(player)
-
-            # check if there's still a tie or we should return just one player
-            if len(players_with_best_double) < 1:
-                raise Exception("No players were put into the 'players with best double' list. Revise the code bro")
-            else:
-                # return whoever is still alive - if there is one that's fine, and if there are more than one that's fine too
-                return players_with_best_double
-
-
-
-        # compare triples first, see if anyone has a higher triple
-            # if so, return the highest player
-
-            # else, its still a tie - 
-                # then compare doubles
-                    # if anyone has a double higher than anyone else, return that player
-                    
-                    # else, the tied players have the same triple and double, return all remaining players
-
-    @staticmethod
-    def getNofAKind(num_occurences:int, sorted_hand: list[Card]) -> list[Card]:
-        """
-        Returns a list of of same-valued cards, if those cards exist in the given `sorted_hand`."""
-        pip_hand = [card.pip_value for card in sorted_hand] 
-        values_to_occurences = Counter(pip_hand)
-
-        for value in values_to_occurences:
-            if values_to_occurences[value] == num_occurences:
-                # return the value which occurs the same amount as num_occurences
-                return [card for card in sorted_hand if card.pip_value == value]
-        raise ValueError(f"No value in the input hand, {sorted_hand}, contained {num_occurences} occurences.")        
-
-    @staticmethod
-    def getBestKicker(players_to_leftovers:dict[Player, list[Card]], remaining_cards:int) -> list[Player]:
-        """
-        Players to leftovers is a dict containing Player objects as keys, and a list of int values which DONT contribute to the player's ranked hand, as the dict's values.\n
-        Checks which input player has the best kicker - recursively if all their first kickers are the same.\n
-        Returns player/players with best kicker\n
-        
-        :param int remaining_cards: `remaining_cards` is the difference between 5 and how big a player's ranked hand is.
-        Since a Texas Hold 'em hand can only be 5 cards max, this means kickers only exist within these 5 cards."""
-        ranker = PokerRanker
-        players_to_kickers = {
-            # player: 5, 
-        }
-
-        def removeCard(hand:list[Card], value:int):
-            """
-            Removes a single Card from the input list of cards, by pip value."""
-            for card in hand:
-                if card.pip_value == value:
-                    hand.remove(card)
-                    break
-
-        # get each players best kicker
-        for player in players_to_leftovers:
-            leftovers = players_to_leftovers[player]
-            best_kicker = ranker.getHighCardVal(leftovers)
-            removeCard(players_to_leftovers[player], best_kicker)
-            players_to_kickers[player] = best_kicker
-        remaining_cards -= 1
-
-        # find the best kicker, and store players who have the best kicker
-        remaining_players:list[Player] = []
-        winning_kicker = 0
-        for player in players_to_kickers:
-            if players_to_kickers[player] > winning_kicker:
-                winning_kicker = players_to_kickers[player]
-                remaining_players.clear()
-                remaining_players.append(player)
-            elif players_to_kickers[player] == winning_kicker:
-                remaining_players.append(player)
-        
-        # only recurse if there are cards left to compare, and there is more than one player left
-        if (len(remaining_players) > 1) and (remaining_cards > 0):
-            players = list(players_to_kickers.keys())
-            # remove players who aren't in remaining players from players_to_leftovers, and then call getBestKicker with tihs modified dict
-            for player in players:
-                if player not in remaining_players:
-                    del players_to_leftovers[player]
-            return ranker.getBestKicker(players_to_leftovers, remaining_cards)
-        
-        elif (len(remaining_players) == 1) or (remaining_cards == 0):
-            return remaining_players
-        
-        else:
-            raise Exception("You really fucked up")
-
-    @staticmethod
-    def breakTripleTie(players:list[Player]) -> list[Player]:
-
-        ranker = PokerRanker
-        rank = Poker.HANDS_TO_RANKS["three of a kind"]
-        players_to_hand_values:dict[Player, int] = {
-            # player: 9,
-        }
-        
-        def getBestTrip(players_dict:dict[Player, int]):
-            best_trip = 0
-            for player in players_dict:
-                trip = players_dict[player]
-                if trip > best_trip:
-                    best_trip = trip
-            return best_trip
-        
-        def getLeftovers(player:Player, triple_val:int) -> list[Card]:
-            """
-            Returns a modified player hand where all the cards with the value of the player's 'three of a kind' have been removed."""
-            leftovers = [card for card in player.complete_hand if card.pip_value != triple_val]
-            return leftovers
-
-        # populate dict
-        for player in players:
-            hand_value = player.possible_hands[rank][0].pip_value # get value of one of the three cards
-            players_to_hand_values[player] = hand_value
-
-        best_triple_value = getBestTrip(players_to_hand_values)
 
-        # remove players who dont have the best 3 of a kind
-        for player in players:
-            player_trip_value = players_to_hand_values[player]
-            if player_trip_value < best_triple_value:
-                del players_to_hand_values[player]
-
-        if len(players_to_hand_values) < 1:
-            raise Exception("The developer (Parker) has made a grave mistake while coding this tie case. Please revise")
-        elif len(players_to_hand_values) == 1:
-            return list(players_to_hand_values.keys())
-        
-        else: # if len players with best value is greater than 1
-            players_to_leftovers = {
-                # player: [4, 5, 7, 9],
-            }
-            # populate players to kickers
-            for player in players:
-                leftovers = getLeftovers(player, players_to_hand_values[player])
-                players_to_leftovers[player] = leftovers
-            winners = ranker.getBestKicker(players_to_leftovers, 2)
-            return winners
-        
-    @staticmethod
-    def getMaxOccurences(sorted_hand: list[Card]) -> int:
-        """
-        This method checks all cards in a hand and returns the maximum amount of times any card number value appears in the hand.\n
-        :param list sorted_hand: A list of 7 sorted cards - acceptable in either in normal or pip format.\n
-        :returns int: Highest num of occurences of any card value in the input sorted_hand 
-        """
-        pip_hand = [card.pip_value for card in sorted_hand] # remove the unecessary card suit for now
-        values_to_occurences = Counter(pip_hand)
-        max_occurences = 0
-        for card_value in values_to_occurences:
-            occurences = values_to_occurences[card_value]
-            if occurences > max_occurences:
-                max_occurences = occurences
-        return max_occurences
-    
-    @staticmethod
-    def getFullHouse(sorted_hand:list[Card]) -> list[Card] | None:
-        """
-        Checks whether a player's hand contains a full house.\n
-        Returns a list of card values representing the full house if so, otherwise returns None.\n
-        :param list sorted_hand: A list of 7 sorted cards - acceptable in either in normal or pip format.\n
-        :returns list full_house: A list of values in this format - [(3, 3, 3), (5, 5)]"""
-        
-        pip_hand = [card.pip_value for card in sorted_hand]
-        occurences_dict = Counter(pip_hand)
-        occurences_list = list(occurences_dict.keys())
-        full_house:list[Card] = [] 
-
-        # add three piece to full_house
-        for card_value in occurences_list:
-            if (occurences_dict[card_value] == 3):
-                triple_value = occurences_dict[card_value]
-                three_piece = [card for card in sorted_hand if card.pip_value == triple_value]
-                full_house = full_house = three_piece
-                # can't delete a dictionary entry while iterating through the dictionary. used this a lot and need it fix it everywhere
-                del occurences_dict[card_value]
-                break
-        # add pair to full_house
-        for card_value in occurences_list:
-            if (occurences_dict[card_value] == 2):
-                pair_value = occurences_dict[card_value]
-                pair = [card for card in sorted_hand if card.pip_value == pair_value]
-                full_house = full_house + pair
-                break
-
-        if len(full_house) == 5:
-            return full_house
-            
-        return None
-    
-    @staticmethod
-    def getTwoPair(sorted_hand:list[Card]) -> list[Card] | None:
-        """
-        Checks whether a player's hand contains two pairs.\n
-        Returns the two-pair hand as a list if so, in format [[value1, value1], [value2, value2]], otherwise returns None.\n
-        :param list sorted_hand: A list of 7 sorted cards - acceptable in either in normal or pip format.\n"""
-        ranker = PokerRanker
-        pip_hand:list[int] = [card.pip_value for card in sorted_hand]
-        occurences_dict = Counter(pip_hand)
-        pairs:list[Card] = []
-        # find all pairs
-        occurences_list = list(occurences_dict.keys())
-        for card_value in occurences_list:
-            if occurences_dict[card_value] == 2:
-                pair_to_add = [card for card in sorted_hand if card.pip_value == card_value]
-                pairs = pairs + pair_to_add
-                del occurences_dict[card_value]
-        if len(pairs) == 4:
-            return pairs
-        elif len(pairs) > 4:
-            # get the best two pairs
-            best_pair1 = ranker.getBestPair(pairs)
-            for card in pairs:
-                if card.pip_value == best_pair1[0].pip_value:
-                    pairs.remove(card)
-            best_pair2 = ranker.getBestPair(pairs)
-            return best_pair1 + best_pair2
-        else:
-            return None
-    
-    @staticmethod 
-    def getBestPair(sorted_hand:list[Card]) -> list[Card]: 
-        """
-        Gets the first pair in a sorted hand, if a pair exists."""
-        pip_hand:list[int] = [card.pip_value for card in sorted_hand]
-        occurences_dict = Counter(pip_hand)
-        possible_pairs:list[list[Card]] = []
-
-        # get any possible pairs
-        for card_value in occurences_dict:
-            if occurences_dict[card_value] == 2:
-                pair = [card for card in sorted_hand if card.pip_value == card_value]
-                possible_pairs.append(pair)
-        
-        # return highest value pair if there's more than one
-        best_pair = possible_pairs[0] # list of list of cards
-        best_pair_val = best_pair[0].pip_value 
-        for pair in possible_pairs:
-            pair_val = pair[0].pip_value
-            if pair_val > best_pair_val:
-                best_pair_val = pair_val
-        
-        # get best pair
-        for pair in possible_pairs:
-            if pair[0].pip_value == best_pair_val:
-                best_pair = pair
-        
-        return best_pair
-
-
-    @staticmethod
-    def breakPairTie(players:list[Player]) -> list[Player]:
-        ranker = PokerRanker
-        rank = Poker.HANDS_TO_RANKS["pair"]
-        players_to_hand_value:dict[Player, int] = {
-            # player: 5,
-        }
-
-        def getBestPairVal(players_dict:dict[Player, int]) -> int:
-            best_pair_val = 0
-            for player in players_dict:
-                pair_val = players_dict[player]
-                if pair_val > best_pair_val:
-                    best_pair_val = pair_val
-            return best_pair_val
-            
-        # populate dict
-        for player in players:
-            hand_value = player.possible_hands[rank][0].pip_value # int
-            players_to_hand_value[player] = hand_value
-        # get best pair
-        best_pair_val = getBestPairVal(players_to_hand_value)
-        # remove players who don't have best pair
-        for player in players:
-            player_pair = players_to_hand_value[player]
-            if player_pair < best_pair_val:
-                del players_to_hand_value[player]
-
-        if len(players_to_hand_value) < 1:
-            raise Exception("The developer (Parker) has made a grave mistake while coding this tie case. Please revise")
-        elif len(players_to_hand_value) == 1:
-            return list(players_to_hand_value.keys())
-        
-        else: # if len players with best value is greater than 1, get best kicker
-            players_to_leftovers:dict[Player, list[Card]] = {
-            # player: [4, 5, 7, 9],
-            }
-            # populate players to kickers
-            for player in players:
-                leftovers = [card for card in player.complete_hand if card.pip_value != players_to_hand_value[player]]
-                players_to_leftovers[player] = leftovers
-            winners = ranker.getBestKicker(players_to_leftovers, 5)
-            return winners
-    
-    @staticmethod
-    def breakTwoPairTie(players:list[Player]) -> list[Player]:
-        """
-        Compares the input players' two pair values to get the best ranked player.\n
-        If two pairs are equal, winner is determined by highest kicker."""
-        ranker = PokerRanker
-        rank = Poker.HANDS_TO_RANKS["two pair"]
-        players_to_two_pair_values:dict[Player, list[int]] = {
-            # player: [value1, value2],
-        }
-
-        def findBestPair(players_to_pairs:dict) -> int:
-            best_pair_value = 0
-            for player in players_to_pairs:
-                for pair_val in players_to_pairs[player]:
-                    if pair_val > best_pair_value:
-                        best_pair_value = pair_val
-            return best_pair_value
-        
-        def removeCard(hand:list[Card], value:int):
-            for card in hand:
-                if card.pip_value == value:
-                    hand.remove(card)
-                    break
-
-        def getLeftovers(player:Player, two_pair_vals:list) -> list[Card]:
-            leftovers = [card for card in player.complete_hand] # player complete hand is a list of cards
-            pair1_val = two_pair_vals[0]
-            pair2_val = two_pair_vals[1]
-            for i in range(2):
-                removeCard(leftovers, pair1_val)
-                removeCard(leftovers, pair2_val)
-            return leftovers
-        
-        # populate dict with two-pair's values
-        for player in players:
-            value1 = player.possible_hands[rank][0].pip_value
-            value2 = player.possible_hands[rank][1].pip_value
-            players_to_two_pair_values[player] = [value1, value2]
-
-        # need to store the player with the highest pair1 value
-            # if any players share the highest pair value, compare their next highest pairs
-                # if still tied, compare kickers and return player with best kicker
-
-        # get the best pair
-        best_pair_val = findBestPair(players_to_two_pair_values)
-
-        # store all players who have a pair the value of best pair, and remove this value from players who have it
-        for player in players:
-            player_pairs = players_to_two_pair_values[player]
-            if best_pair_val in player_pairs:
-                players_to_two_pair_values[player].remove(best_pair_val) # remove instances of best value from players who have it
-            elif best_pair_val not in player_pairs:
-                del players_to_two_pair_values[player]
-                 # completely remove players who don't have the best value
-
-        remaining_players = [player for player in players_to_two_pair_values]
-
-        if len(remaining_players) < 1:
-            raise Exception("bruh moment")
-        elif len(remaining_players) == 1:
-            return remaining_players
-        else:
-            # if more than one player remains, compare the players' next pair
-            best_pair_val = findBestPair(players_to_two_pair_values)
-
-            # repeat steps used to compare first pair
-            for player in remaining_players:
-                player_pairs = players_to_two_pair_values[player]
-                if best_pair_val in player_pairs:
-                    players_to_two_pair_values[player].remove(best_pair_val)
-                elif best_pair_val not in player_pairs:
-                    del players_to_two_pair_values[player]
-
-            remaining_players = [player for player in players_to_two_pair_values]
-
-            if len(remaining_players) < 1:
-                raise Exception("The developer (Parker) has made a grave mistake while coding this tie case. Please revise")
-            elif len(remaining_players) == 1:
-                return remaining_players
-            else: 
-                # if there are still tied players, winner is determined by whoever has the best kicker
-                players_to_leftovers:dict[Player, list[Card]] = {
-                    # player: [4, 5, 7, 9],
-                }
-                # populate players to kickers
-                for player in players:
-                    leftovers = getLeftovers(player, players_to_two_pair_values[player])
-                    players_to_leftovers[player] = leftovers
-                # pass in 1 as 'remaining cards' since a hold em hand consists of 5 cards, so the only kicker would be the player's next highest card
-                winners = ranker.getBestKicker(players_to_leftovers, 1)
-                return winners
-    
-    @staticmethod
-    def getHighCard(sorted_hand:list[Card]) -> list[Card]:
-        """
-        Returns the highest value card from a list of Cards."""
-        highest_card = sorted_hand[0]
-        for card in sorted_hand:
-            card_val = card.pip_value 
-            if card_val > highest_card.pip_value:
-                highest_card = card
-        return [highest_card]
-
-    @staticmethod
-    def getHighCardVal(hand:list[Card]) -> int:
-        """
-        Returns the highest pip value of all cards in a player's hand.
-        :param list sorted_hand: A list of cards.\n"""
-        highest_card_val = 0
-        for card in hand:
-            card_val = card.pip_value 
-            if card_val > highest_card_val:
-                highest_card_val = card_val
-        return highest_card_val
-
-    @staticmethod
-    def breakHighCardTie(players:list[Player]) -> list[Player]:
-        ranker = PokerRanker
-        # wrap up logic in a function since we will have to execute the exact same thing again twice if players are tied after the first go
-        def getBestPlayers(players:list[Player]):
-            players_to_best_val:dict[Player, int] = {}
-            best_val = 0
-            for player in players:
-                best_card = ranker.getHighCard(player.hand)[0] # highest card will be last since cards are sorted in ascending order
-                players_to_best_val[player] = best_card.pip_value
-                if best_card.pip_value > best_val:
-                    best_val = best_card.pip_value
-                player.hand.remove(best_card)
-            #compare best vals, keep only the players who have the highest value
-            for player in players:
-                if players_to_best_val[player] != best_val:
-                    del players_to_best_val[player]
-            return players_to_best_val
-        
-
-        players_to_best_val = getBestPlayers(players)
-        if len(players_to_best_val) > 1:
-            final_players = list(players_to_best_val.keys())
-            final_winners = getBestPlayers(final_players)
-            return list(final_winners.keys()) # return the players who remain in the dict, as a list
-            
-        elif len(players_to_best_val) == 1:
-            return list(players_to_best_val.keys())
-
-        else:
-            raise Exception("Boi how tf did you return no winners during a high card comparison. You are wild")
-            
-
-        
-        # need to compare the two cards players are dealt.
-        # if players tie with these two cards, then return them both, because that means the rest of their cards
-        # (the community cards) will be the same, resulting in a tie.
+class HandEvaluator:
+    """
+    Scores poker hands with precomputed lookup tables, so showdowns are a comparison of integers.\n
+    Every 5 card hand is one of 7462 distinct hand classes, numbered from 1 (a royal flush) to 7462 (7-5-4-3-2 high card); lower is better. A 6 or 7 card set scores as its best 5 card hand.\n
+    Each card is packed into one integer: the bit for its rank (bits 16-28), its suit (bits 12-15), its rank index (bits 8-11) and a prime for its rank (bits 0-7).
+    Flushes are looked up by the OR of their rank bits, every other hand by the product of its rank primes, which is the same for any order of the same ranks."""
+
+    PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41) # one per rank, 2 through ace
+    SUIT_BITS = {"club": 0x8000, "diamond": 0x4000, "heart": 0x2000, "spade": 0x1000}
+
+    # the worst hand class of each category, best category first, with its key in Poker.RANKS_TO_HANDS
+    CATEGORY_FLOORS = (
+        (1, 0), # royal flush
+        (10, 1), # straight flush
+        (166, 2), # four of a kind
+        (322, 3), # full house
+        (1599, 4), # flush
+        (1609, 5), # straight
+        (2467, 6), # three of a kind
+        (3325, 7), # two pair
+        (6185, 8), # pair
+        (7462, 9), # high card
+    )
+
+    flushes:list[int] = [] # rank bits of a flush : hand class, 0 where the bits aren't five distinct ranks
+    products:dict[int, int] = {} # product of rank primes : hand class, for every hand that isn't a flush
+
+    @classmethod
+    def _buildTables(cls) -> None:
+        """Numbers all 7462 hand classes from best to worst, and fills in the lookup tables."""
+        ranks = range(12, -1, -1) # ace down to 2, as indexes into PRIMES
+        primes = cls.PRIMES
+
+        def product(hand_ranks) -> int:
+            total = 1
+            for rank in hand_ranks:
+                total *= primes[rank]
+            return total
+
+        # ace high down to the wheel, which plays the ace low
+        straights = [tuple(range(high, high - 5, -1)) for high in range(12, 3, -1)] + [(3, 2, 1, 0, 12)]
+        straight_sets = {frozenset(straight) for straight in straights}
+        # five distinct ranks that aren't a straight, best first
+        high_cards = [hand for hand in itertools.combinations(ranks, 5) if frozenset(hand) not in straight_sets]
+
+        flushes = [0] * 8192
+        products = {}
+        value = 1
+        for straight in straights:
+            flushes[sum(1 << rank for rank in straight)] = value
+            value += 1
+        for quad in ranks:
+            for kicker in ranks:
+                if kicker != quad:
+                    products[product((quad,) * 4 + (kicker,))] = value
+                    value += 1
+        for trips in ranks:
+            for pair in ranks:
+                if pair != trips:
+                    products[product((trips,) * 3 + (pair,) * 2)] = value
+                    value += 1
+        for hand in high_cards:
+            flushes[sum(1 << rank for rank in hand)] = value
+            value += 1
+        for straight in straights:
+            products[product(straight)] = value
+            value += 1
+        for trips in ranks:
+            for kickers in itertools.combinations([rank for rank in ranks if rank != trips], 2):
+                products[product((trips,) * 3 + kickers)] = value
+                value += 1
+        for high_pair, low_pair in itertools.combinations(ranks, 2):
+            for kicker in ranks:
+                if kicker != high_pair and kicker != low_pair:
+                    products[product((high_pair, high_pair, low_pair, low_pair, kicker))] = value
+                    value += 1
+        for pair in ranks:
+            for kickers in itertools.combinations([rank for rank in ranks if rank != pair], 3):
+                products[product((pair, pair) + kickers)] = value
+                value += 1
+        for hand in high_cards:
+            products[product(hand)] = value
+            value += 1
+        cls.flushes = flushes
+        cls.products = products
+
+    @classmethod
+    def encode(cls, card:Card) -> int:
+        """Packs a poker Card into the integer the lookup tables are keyed by."""
+        rank = card.pip_value - 2
+        return (1 << (16 + rank)) | cls.SUIT_BITS[card.suit] | (rank << 8) | cls.PRIMES[rank]
+
+    @classmethod
+    def _evaluateFive(cls, c1:int, c2:int, c3:int, c4:int, c5:int) -> int:
+        if c1 & c2 & c3 & c4 & c5 & 0xF000:
+            return cls.flushes[(c1 | c2 | c3 | c4 | c5) >> 16]
+        return cls.products[(c1 & 0xFF) * (c2 & 0xFF) * (c3 & 0xFF) * (c4 & 0xFF) * (c5 & 0xFF)]
+
+    @classmethod
+    def evaluate(cls, cards:list[Card]) -> tuple[int, list[Card]]:
+        """
+        Scores 5 to 7 cards. Returns the hand class of their best 5 card hand (lower is better), and those 5 cards."""
+        if not cls.products:
+            cls._buildTables()
+        encoded = [cls.encode(card) for card in cards]
+        best_value = 7463
+        best_hand = ()
+        for hand in itertools.combinations(range(len(cards)), 5):
+            value = cls._evaluateFive(*(encoded[i] for i in hand))
+            if value < best_value:
+                best_value = value
+                best_hand = hand
+        return best_value, [cards[i] for i in best_hand]
+
+    @classmethod
+    def category(cls, value:int) -> int:
+        """Returns the key in Poker.RANKS_TO_HANDS for a hand class."""
+        for floor, rank in cls.CATEGORY_FLOORS:
+            if value <= floor:
+                return rank
+        raise ValueError(f"{value} isn't a hand class, they run from 1 to 7462.")
 
 
 async def setup(bot):
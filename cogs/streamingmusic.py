@@ -13,6 +13,7 @@ from discord.ext.commands.errors import ExtensionFailed
 from wavelink import Player, AutoPlayMode, TrackSource, LavalinkLoadException
 
 from config.configuration import LAVALINK_URI, LAVALINK_PASS, WORKING_DIRECTORY
+from messaging import RestScheduler, Priority
 
 music_log_path = Path(WORKING_DIRECTORY) / "music.log"
 music_handler = logging.FileHandler(music_log_path, encoding="utf-8", mode="w")
@@ -27,6 +28,7 @@ class StreamingCog(Cog):
     def __init__(self, bot):
         self.bot = bot
         self.node = None
+        self.rest = RestScheduler.shared()
 
     @staticmethod
     def parse_seconds(time:str) -> int:
@@ -300,7 +302,7 @@ class StreamingCog(Cog):
             channel = await self.get_bot_last_text_channel(player)
             message = Embed(title=f"Playing: {song_title}", color=Colour.brand_green())
             message.set_thumbnail(url=player.current.artwork)
-            await channel.send(embed=message, silent=True)
+            await self.rest.send(channel, Priority.NOTIFICATION, embed=message, silent=True)
         except AttributeError as e: # would happen is player.current is None (in my experience this is caused by Lavalink needing to refresh its youtube 'viewer ID')
             #TODO handle error by attempting to play request again (give play a retries parameter?)
             logger.debug(f"Lavalink encountered an error while trying to play your song. Here's the player {player}, here's the player from payload: {payload.player}, here's the song that failed to play {payload.track}. Here's the error: {e}")
@@ -74,14 +74,21 @@ class ConfigWizard:
             "DATA_DIRECTORY" : str(Path(here) / "data"),
             "BANK_PATH" : str(Path(here) / "data" / "bank.csv"),
             "THREADS_PATH" : str(Path(here) / "data" / "threads.csv"),
+            "SQLITE_PATH" : str(Path(here) / "data" / "parkbot.db"),
             "NAUGHTY_WORDS" : "", # provide them as comma separated and parse the csv when needed
             "DB_OPTION" : "csv", # default to csv file
+            "BANK_FLUSH_INTERVAL" : "30", # seconds between bank writes for file based db options
+            "BALANCE_CACHE_TTL" : "5", # seconds a cached balance is trusted by the economy cog
+            "GUILD_IDLE_TIMEOUT" : "1800", # seconds before an idle guild's game state is dropped
+            "TABLE_SIZE" : "8", # most players seated at one game table
+            "POKER_MAX_BUY_IN" : "1000", # most GleepCoins a player brings to a poker table
         }
         new_config["MYSQL"] = {
             "MYSQL_USER" : "",
             "MYSQL_PASS" : "",
             "MYSQL_URL" : "", # provide with or without PORT, defaults to 3306
             "MYSQL_DATABASE" : "",
+            "MYSQL_POOL_SIZE" : "5", # max connections shared by all cogs
         }
         new_config["MUSIC"] = {
             "LAVALINK_URI": "",
@@ -49,6 +49,12 @@ BANK_PATH = required["bank_path"]
 THREADS_PATH = required["threads_path"]
 NAUGHTY_WORDS = list_from_csv(required["naughty_words"])
 DB_OPTION = required["db_option"]
+SQLITE_PATH = required.get("sqlite_path", str(Path(DATA_DIRECTORY) / "parkbot.db"))
+BANK_FLUSH_INTERVAL = float(required.get("bank_flush_interval", 30)) # seconds between writes of the in-memory csv bank to disk
+BALANCE_CACHE_TTL = float(required.get("balance_cache_ttl", 5)) # seconds the economy cog trusts a cached balance
+GUILD_IDLE_TIMEOUT = float(required.get("guild_idle_timeout", 1800)) # seconds before a controller drops an idle guild's state
+TABLE_SIZE = int(required.get("table_size", 8)) # most players the matchmaker seats at one table
+POKER_MAX_BUY_IN = int(required.get("poker_max_buy_in", 1000)) # most GleepCoins a player brings to a poker table
 
 mysql_properties = config["MYSQL"]
 MYSQL_USER = mysql_properties["mysql_user"]
@@ -60,6 +66,7 @@ try:
     MYSQL_PORT = mysql_properties["mysql_url"].split(":")[1]
 except IndexError:
     pass
+MYSQL_POOL_SIZE = int(mysql_properties.get("mysql_pool_size", 5)) # max MySQL connections shared by all cogs
 
 music = config["MUSIC"]
 LAVALINK_URI = music["lavalink_uri"]
@@ -1,5 +1,21 @@
-from enum import Enum
+import os
+import csv
+import time
+import mmap
+import heapq
+import bisect
+import struct
+import atexit
+import shutil
+import asyncio
 import logging
+import sqlite3
+import threading
+from enum import Enum
+from collections import deque
+from functools import partial
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pandas as pd
@@ -7,7 +23,7 @@ import mysql.connector
 from mysql.connector import Error, errorcode, MySQLConnection
 from mysql.connector.abstracts import MySQLConnectionAbstract
 
-from config.configuration import DB_OPTION, WORKING_DIRECTORY, THREADS_PATH, BANK_PATH, MYSQL_HOST, MYSQL_PORT, MYSQL_PASS, MYSQL_DATABASE, MYSQL_USER
+from config.configuration import DB_OPTION, WORKING_DIRECTORY, THREADS_PATH, BANK_PATH, BANK_FLUSH_INTERVAL, MYSQL_HOST, MYSQL_PORT, MYSQL_PASS, MYSQL_DATABASE, MYSQL_USER, MYSQL_POOL_SIZE, SQLITE_PATH
 
 # data is stored like this:
     # user_id : str - a user's Discord user ID (18 character string)
@@ -16,6 +32,9 @@ from config.configuration import DB_OPTION, WORKING_DIRECTORY, THREADS_PATH, BAN
 
 MAIN_TABLE_NAME = "users"
 THREADS_TABLE_NAME = "poker_threads"
+GUILD_MEMBERS_TABLE_NAME = "guild_members"
+TRANSACTIONS_TABLE_NAME = "transactions"
+LAST_TRANSACTION_ID = 2**63 - 1 # keyset pagination starts below this id when no `before_id` is given
 
 logger = logging.Logger("db_logger")
 db_log_path = Path(WORKING_DIRECTORY) / "db.log"
@@ -25,7 +44,10 @@ logger.addHandler(db_log_handler)
 
 class ConnectionType(Enum):
     csv = "csv file"
+    ledger = "append-only ledger file"
+    mmap = "memory-mapped bank file"
     sql = "SQL database"
+    sqlite = "SQLite database"
 
 class SQLQueryTemplates(Enum):
 
@@ -43,7 +65,7 @@ class SQLQueryTemplates(Enum):
                             "  PRIMARY KEY (`user_id`)"
                             ") ENGINE=InnoDB")
 
-    ADD_USER_TO_BANK = (f"INSERT INTO {MAIN_TABLE_NAME} "
+    ADD_USER_TO_BANK = (f"INSERT IGNORE INTO {MAIN_TABLE_NAME} "
                         "(user_id, username, gleepcoins) "
                         "VALUES (%(user_id)s, %(username)s, %(gleepcoins)s)")
     
@@ -57,11 +79,14 @@ class SQLQueryTemplates(Enum):
     GET_GUILD_THREADS = (f"SELECT * FROM {THREADS_TABLE_NAME} "
                     "WHERE guild_id = %s")
     GET_THREAD_ID = (f"SELECT * FROM {THREADS_TABLE_NAME} "
-                     "WHERE user_id = '%s' AND guild_id = '%s'")
+                     "WHERE user_id = %s AND guild_id = %s")
     
     UPDATE_USER_GLEEPCOINS = (f"UPDATE {MAIN_TABLE_NAME} "
                               "SET gleepcoins = %s "
                               "WHERE user_id = %s")
+    ADJUST_USER_GLEEPCOINS = (f"UPDATE {MAIN_TABLE_NAME} "
+                              "SET gleepcoins = gleepcoins + %(delta)s "
+                              "WHERE user_id = %(user_id)s AND gleepcoins + %(delta)s >= %(floor)s")
     CHECK_TABLE_EXISTS = (
         "SELECT * FROM information_schema.tables "
         # f"WHERE table_schema = {MYSQL_DATABASE} "
@@ -72,7 +97,49 @@ class SQLQueryTemplates(Enum):
     GET_USER = (f"SELECT * FROM {MAIN_TABLE_NAME} "
                 "WHERE user_id = %s")
     
-    GET_ALL_ROWS = (f"SELECT * FROM {MAIN_TABLE_NAME}")
+    CREATE_GUILD_MEMBERS_TABLE = (f"CREATE TABLE `{GUILD_MEMBERS_TABLE_NAME}` ("
+                            "  `guild_id` varchar(32) NOT NULL,"
+                            "  `user_id` varchar(18) NOT NULL,"
+                            "  PRIMARY KEY (`guild_id`, `user_id`)"
+                            ") ENGINE=InnoDB")
+
+    # an earlier version indexed gleepcoins for the leaderboard, but it can't serve the guild filtered sort and slows every balance update
+    DROP_GLEEPCOINS_INDEX = (f"DROP INDEX `idx_{MAIN_TABLE_NAME}_gleepcoins` ON `{MAIN_TABLE_NAME}`")
+
+    ADD_GUILD_MEMBER = (f"INSERT IGNORE INTO {GUILD_MEMBERS_TABLE_NAME} "
+                        "(guild_id, user_id) "
+                        "VALUES (%s, %s)")
+
+    REMOVE_GUILD_MEMBER = (f"DELETE FROM {GUILD_MEMBERS_TABLE_NAME} "
+                           "WHERE guild_id = %s AND user_id = %s")
+
+    GET_GUILD_MEMBER_IDS = (f"SELECT user_id FROM {GUILD_MEMBERS_TABLE_NAME} "
+                            "WHERE guild_id = %s")
+
+    GET_GUILD_LEADERBOARD = (f"SELECT u.username, u.gleepcoins FROM {GUILD_MEMBERS_TABLE_NAME} g "
+                             f"JOIN {MAIN_TABLE_NAME} u ON u.user_id = g.user_id "
+                             "WHERE g.guild_id = %s "
+                             "ORDER BY u.gleepcoins DESC, u.user_id "
+                             "LIMIT %s OFFSET %s")
+
+    CREATE_TRANSACTIONS_TABLE = (f"CREATE TABLE `{TRANSACTIONS_TABLE_NAME}` ("
+                            "  `id` bigint NOT NULL AUTO_INCREMENT,"
+                            "  `user_id` varchar(18) NOT NULL,"
+                            "  `delta` int NOT NULL,"
+                            "  `reason` varchar(64) NOT NULL,"
+                            "  `created_at` int unsigned NOT NULL,"
+                            "  PRIMARY KEY (`id`),"
+                            f"  KEY `idx_{TRANSACTIONS_TABLE_NAME}_user` (`user_id`, `id`)"
+                            ") ENGINE=InnoDB")
+
+    ADD_TRANSACTION = (f"INSERT INTO {TRANSACTIONS_TABLE_NAME} "
+                       "(user_id, delta, reason, created_at) "
+                       "VALUES (%s, %s, %s, %s)")
+
+    GET_USER_TRANSACTIONS = (f"SELECT id, delta, reason, created_at FROM {TRANSACTIONS_TABLE_NAME} "
+                             "WHERE user_id = %s AND id < %s "
+                             "ORDER BY id DESC "
+                             "LIMIT %s")
 
 
 class DBConnection:
@@ -96,6 +163,11 @@ class DBConnection:
         """Create a row in the bank database for a new user, if this user doesn't already exist in the database."""
         pass
 
+    def is_known_user(self, user_id:str) -> bool:
+        """Returns True if this process already knows the user has a bank row, without touching storage.\n
+        A False result only means the user still needs provisioning."""
+        return False
+
     def set_user_amount(self, user_id:int, amount:int) -> None:
         """Set a given user's GleepCoins value."""
         pass
@@ -104,8 +176,38 @@ class DBConnection:
         """Returns the given user's GleepCoins value, or None if user doesn't exist."""
         pass
 
-    def stringify_all_user_amounts(self, ctx) -> str:
-        """Returns a string containing each user's name and GleepCoin count, separated by newline characters.\n\nExample formatting: `f"{username}: {user_gleepcoins} GleepCoins`.\nContext `ctx` is required to determine which guild to grab player data for."""
+    def adjust_user_amount(self, user_id:str, delta:int, floor:int = 0) -> bool:
+        """Atomically adds `delta` to a user's GleepCoins, unless the result would fall below `floor`.\n
+        Returns True if the balance was changed, False if the user doesn't exist or can't afford it."""
+        pass
+
+    def apply_settlement(self, deltas:dict[str, int]) -> bool:
+        """Applies a whole round's payouts, `{user_id : delta}`, as a single transaction.\n
+        Returns True if every delta was applied. If any user is missing or would go below 0, nothing is applied and False is returned."""
+        pass
+
+    def add_guild_members(self, guild_id:str, user_ids:list[str]) -> None:
+        """Records that each of `user_ids` is a member of the guild `guild_id`. Already recorded members are ignored."""
+        pass
+
+    def remove_guild_members(self, guild_id:str, user_ids:list[str]) -> None:
+        """Forgets that each of `user_ids` is a member of the guild `guild_id`, so they drop off its leaderboard."""
+        pass
+
+    def get_guild_member_ids(self, guild_id:str) -> set[str]:
+        """Returns the ids of every recorded member of the guild `guild_id`."""
+        pass
+
+    def get_guild_leaderboard(self, guild_id:str, limit:int, offset:int = 0) -> list[tuple[str, int]]:
+        """Returns up to `limit` `(username, gleepcoins)` pairs for the guild's members who have a bank balance, richest first, skipping the first `offset`."""
+        pass
+
+    def record_transactions(self, transactions:list[tuple[str, int, str, int]]) -> bool:
+        """Appends a batch of `(user_id, delta, reason, created_at)` records to the transactions ledger. Returns True if the whole batch was written."""
+        pass
+
+    def get_user_transactions(self, user_id:str, before_id:int | None = None, limit:int = 10) -> list[tuple[int, int, str, int]]:
+        """Returns up to `limit` of a user's `(id, delta, reason, created_at)` transactions, newest first, starting below `before_id` when it's given."""
         pass
 
     def add_thread_id_if_none(self, username:str, thread_id:str, guild_id:str) -> None:
@@ -120,10 +222,575 @@ class DBConnection:
         """Retrieve a user's thread ID for this channel, creating one if one doesn't exist."""
         pass
 
+class BankCache:
+    """In-memory copy of a csv bank file, shared by every CSVConnection in the process.\n
+    Balances are read from and written to `self.users`, keyed by user id. A background thread writes the bank back to disk every `flush_interval` seconds if it changed, and once more when the process exits."""
+
+    _instances:dict[tuple[type, Path], "BankCache"] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, bank_path:Path, flush_interval:float = BANK_FLUSH_INTERVAL) -> "BankCache":
+        """Returns the process-wide cache for `bank_path`, loading it from disk on first use."""
+        key = (cls, Path(bank_path).resolve())
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(Path(bank_path), flush_interval)
+            return cls._instances[key]
+
+    def __init__(self, bank_path:Path, flush_interval:float):
+        self.bank_path = bank_path
+        self.flush_interval = flush_interval
+        self.users:dict[str, list] = {} # {user_id : [gleepcoins, username]}
+        self.lock = threading.RLock() # guards `users` and `dirty`
+        self.dirty = False
+        self._flush_lock = threading.Lock() # serializes writes to the bank file
+        self._closed = threading.Event()
+        self.load()
+        self._flusher = threading.Thread(target=self._flush_loop, name=f"bank-flusher-{bank_path.name}", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def load(self) -> None:
+        """Reads the bank file into memory. Only done once per process."""
+        df = pd.read_csv(self.bank_path, dtype={"UserId": str, "Username": str})
+        with self.lock:
+            self.users = {row.UserId: [int(row.GleepCoins), row.Username] for row in df.itertuples(index=False)}
+        logger.debug(f"Loaded {len(self.users)} users from {self.bank_path} into the bank cache.")
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes the bank to disk if it has changed since the last flush."""
+        with self._flush_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                rows = [(user_id, amount, username) for user_id, (amount, username) in self.users.items()]
+                self.dirty = False
+            if not self._write_snapshot(rows):
+                with self.lock:
+                    self.dirty = True
+
+    def _write_snapshot(self, rows:list[tuple[str, int, str]]) -> bool:
+        """Writes `rows` to the bank file. Returns True if the write succeeded."""
+        try:
+            # write a temp file then swap it in, so a crash mid-write can't truncate the bank
+            temp_path = self.bank_path.with_suffix(".tmp")
+            pd.DataFrame(rows, columns=["UserId", "GleepCoins", "Username"]).to_csv(temp_path, index=False)
+            os.replace(temp_path, self.bank_path)
+            return True
+        except OSError as e:
+            logger.error(f"Failed to write the bank snapshot to {self.bank_path}. {e}")
+            return False
+
+    def close(self) -> None:
+        """Stops the background flusher and writes any remaining changes."""
+        self._closed.set()
+        self.flush()
+
+    def _changed(self, *user_ids:str) -> None:
+        """Called with `self.lock` held after the entries for `user_ids` were added or modified."""
+        self.dirty = True
+
+    # storage primitives, always called with `self.lock` held. subclasses that keep balances somewhere other than `self.users` override these.
+
+    def _balance(self, user_id:str) -> int | None:
+        user = self.users.get(user_id)
+        return None if user is None else user[0]
+
+    def _store_balance(self, user_id:str, amount:int) -> None:
+        self.users[user_id][0] = amount
+
+    def _insert(self, user_id:str, username:str, amount:int) -> None:
+        self.users[user_id] = [amount, username]
+
+    def _username(self, user_id:str) -> str:
+        return self.users[user_id][1]
+
+    def get_amount(self, user_id:str) -> int | None:
+        with self.lock:
+            return self._balance(user_id)
+
+    def create_if_none(self, user_id:str, username:str, amount:int = 1000) -> bool:
+        """Adds a user to the bank if they aren't in it. Returns True if a user was added."""
+        with self.lock:
+            if self._balance(user_id) is not None:
+                return False
+            self._insert(user_id, username, amount)
+            self._changed(user_id)
+            return True
+
+    def set_amount(self, user_id:str, amount:int) -> bool:
+        with self.lock:
+            if self._balance(user_id) is None:
+                return False
+            self._store_balance(user_id, int(amount))
+            self._changed(user_id)
+            return True
+
+    def adjust(self, user_id:str, delta:int, floor:int = 0) -> bool:
+        with self.lock:
+            balance = self._balance(user_id)
+            if balance is None or balance + delta < floor:
+                return False
+            self._store_balance(user_id, balance + int(delta))
+            self._changed(user_id)
+            return True
+
+    def apply(self, deltas:dict[str, int], floor:int = 0) -> bool:
+        """Adds each delta to its user's balance. Nothing is applied if any user is missing or would fall below `floor`."""
+        with self.lock:
+            balances = {user_id: self._balance(user_id) for user_id in deltas}
+            for user_id, delta in deltas.items():
+                if balances[user_id] is None or balances[user_id] + delta < floor:
+                    return False
+            for user_id, delta in deltas.items():
+                self._store_balance(user_id, balances[user_id] + int(delta))
+            self._changed(*deltas)
+            return True
+
+    def leaderboard(self, user_ids:set[str], limit:int, offset:int = 0) -> list[tuple[str, int]]:
+        """Returns `(username, gleepcoins)` for the richest of `user_ids` who are in the bank, richest first."""
+        with self.lock:
+            balances = [(self._balance(user_id), user_id) for user_id in user_ids]
+            # only sort as far as the requested page
+            top = heapq.nlargest(offset + limit, [entry for entry in balances if entry[0] is not None])[offset:]
+            return [(self._username(user_id), amount) for amount, user_id in top]
+
+
+class LedgerBankCache(BankCache):
+    """A BankCache which appends one record per balance change to a ledger file, instead of rewriting the bank.\n
+    The bank file acts as a snapshot. On startup the snapshot is loaded and the ledger is replayed over it; once the ledger holds more records than the bank holds users, the flusher folds it into a new snapshot."""
+
+    def __init__(self, bank_path:Path, flush_interval:float):
+        self.ledger_path = bank_path.with_suffix(".ledger")
+        self.compacting_path = bank_path.with_suffix(".ledger.old") # ledger being folded into a snapshot
+        self.records = 0
+        self._ledger = None
+        self._writer = None
+        super().__init__(bank_path, flush_interval)
+
+    def load(self) -> None:
+        super().load()
+        with self.lock:
+            # a leftover compacting ledger means we crashed mid-compaction; records hold absolute balances, so replaying both is safe
+            for path in (self.compacting_path, self.ledger_path):
+                self.records += self._replay(path)
+            self._ledger = open(self.ledger_path, "a", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._ledger)
+        logger.debug(f"Replayed {self.records} ledger records from {self.ledger_path}.")
+
+    def _replay(self, path:Path) -> int:
+        if not path.is_file():
+            return 0
+        replayed = 0
+        with open(path, "r", newline="", encoding="utf-8") as file:
+            for record in csv.reader(file):
+                try:
+                    user_id, amount, username = record
+                    self.users[user_id] = [int(amount), username]
+                    replayed += 1
+                except ValueError:
+                    # a torn final line from a crash mid-append
+                    logger.warning(f"Skipping malformed ledger record in {path}: {record}")
+        return replayed
+
+    def _changed(self, *user_ids:str) -> None:
+        self._writer.writerows((user_id, self._balance(user_id), self._username(user_id)) for user_id in user_ids)
+        self._ledger.flush()
+        self.records += len(user_ids)
+
+    def flush(self) -> None:
+        """Compacts the ledger once it outgrows the snapshot, keeping compaction cost amortized per write."""
+        with self.lock:
+            if self.records <= len(self.users):
+                return
+        self.compact()
+
+    def compact(self) -> None:
+        """Folds the ledger into a fresh bank snapshot."""
+        with self._flush_lock:
+            with self.lock:
+                if self.records == 0:
+                    return
+                rows = [(user_id, amount, username) for user_id, (amount, username) in self.users.items()]
+                # rotate the ledger so appends can continue while the snapshot is written
+                self._ledger.close()
+                if self.compacting_path.is_file():
+                    # an earlier snapshot failed, so its records are still only in the compacting ledger; keep them ahead of the newer ones
+                    self._append_ledger(self.ledger_path, self.compacting_path)
+                    self.ledger_path.unlink()
+                else:
+                    os.replace(self.ledger_path, self.compacting_path)
+                self._ledger = open(self.ledger_path, "a", newline="", encoding="utf-8")
+                self._writer = csv.writer(self._ledger)
+                compacted_records = self.records
+                self.records = 0
+            if self._write_snapshot(rows):
+                self.compacting_path.unlink()
+            else:
+                with self.lock:
+                    self.records += compacted_records
+
+    @staticmethod
+    def _append_ledger(source:Path, destination:Path) -> None:
+        """Appends the records in `source` to the ledger at `destination`."""
+        with open(destination, "ab+") as out, open(source, "rb") as records:
+            # don't glue the first new record onto a torn final line
+            out.seek(0, os.SEEK_END)
+            if out.tell() > 0:
+                out.seek(-1, os.SEEK_END)
+                if out.read(1) != b"\n":
+                    out.write(b"\n")
+            shutil.copyfileobj(records, out)
+
+    def close(self) -> None:
+        self._closed.set()
+        self.compact()
+        with self.lock:
+            self._ledger.close()
+
+
+def convert_csv_bank_to_mmap(csv_path:Path, mmap_path:Path, names_path:Path) -> int:
+    """Converts a csv bank (the `bank_path` file) into the fixed-width memory-mapped bank format used by MMapBankCache. Returns the number of users converted."""
+    df = pd.read_csv(csv_path, dtype={"UserId": str, "Username": str})
+    records = bytearray()
+    names = bytearray()
+    for row in df.itertuples(index=False):
+        records += MMapBankCache.RECORD.pack(int(row.UserId), int(row.GleepCoins), len(names))
+        names += f"{row.Username}\n".encode("utf-8")
+    capacity = max(MMapBankCache.MIN_CAPACITY, len(df.index))
+    records += bytes(MMapBankCache.RECORD.size * (capacity - len(df.index)))
+    # write both files beside their destination then swap them in, so a half-written bank is never picked up
+    temp_names = names_path.with_name(f"{names_path.name}.tmp")
+    temp_mmap = mmap_path.with_name(f"{mmap_path.name}.tmp")
+    temp_names.write_bytes(bytes(names))
+    temp_mmap.write_bytes(MMapBankCache.HEADER.pack(MMapBankCache.MAGIC, len(df.index)) + bytes(records))
+    os.replace(temp_names, names_path)
+    os.replace(temp_mmap, mmap_path)
+    logger.info(f"Converted {len(df.index)} users from {csv_path} to {mmap_path}.")
+    return len(df.index)
+
+
+class MMapBankCache(BankCache):
+    """A bank stored as fixed-width binary records in a memory-mapped file, for very large user counts.\n
+    Each record holds a user id, their balance, and the offset of their username in a separate append-only names file. An in-memory hash index maps user ids to record slots, so balance reads and writes touch a single record in place instead of parsing or rewriting the bank.
+    The first time it's used, the existing csv bank is converted. Dirty pages are flushed to disk by the background flusher."""
+
+    MAGIC = b"PKBANK01"
+    HEADER = struct.Struct("<8sQ") # magic, record count
+    RECORD = struct.Struct("<QqQ") # user id, gleepcoins, username offset
+    BALANCE = struct.Struct("<q")
+    BALANCE_OFFSET = 8 # position of the balance within a record
+    MIN_CAPACITY = 1024
+
+    def __init__(self, bank_path:Path, flush_interval:float):
+        self.mmap_path = bank_path.with_suffix(".mmap")
+        self.names_path = bank_path.with_suffix(".names")
+        self.slots:dict[str, int] = {} # {user_id : record slot}
+        self.count = 0
+        super().__init__(bank_path, flush_interval)
+
+    def load(self) -> None:
+        if not self.mmap_path.is_file():
+            convert_csv_bank_to_mmap(self.bank_path, self.mmap_path, self.names_path)
+        self._file = open(self.mmap_path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._names = open(self.names_path, "a+b")
+        magic, self.count = MMapBankCache.HEADER.unpack_from(self._map, 0)
+        if magic != MMapBankCache.MAGIC:
+            raise ValueError(f"{self.mmap_path} is not a memory-mapped bank file.")
+        records_end = MMapBankCache.HEADER.size + self.count * MMapBankCache.RECORD.size
+        with self.lock:
+            for slot, (user_id, _, _) in enumerate(MMapBankCache.RECORD.iter_unpack(self._map[MMapBankCache.HEADER.size:records_end])):
+                self.slots[str(user_id)] = slot
+        logger.debug(f"Indexed {self.count} users from {self.mmap_path}.")
+
+    def _record_offset(self, slot:int) -> int:
+        return MMapBankCache.HEADER.size + slot * MMapBankCache.RECORD.size
+
+    def _grow(self) -> None:
+        """Doubles the number of record slots in the bank file."""
+        capacity = (len(self._map) - MMapBankCache.HEADER.size) // MMapBankCache.RECORD.size
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self._record_offset(max(MMapBankCache.MIN_CAPACITY, capacity * 2)))
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _balance(self, user_id:str) -> int | None:
+        slot = self.slots.get(user_id)
+        if slot is None:
+            return None
+        return MMapBankCache.BALANCE.unpack_from(self._map, self._record_offset(slot) + MMapBankCache.BALANCE_OFFSET)[0]
+
+    def _store_balance(self, user_id:str, amount:int) -> None:
+        MMapBankCache.BALANCE.pack_into(self._map, self._record_offset(self.slots[user_id]) + MMapBankCache.BALANCE_OFFSET, amount)
+
+    def _insert(self, user_id:str, username:str, amount:int) -> None:
+        if self._record_offset(self.count + 1) > len(self._map):
+            self._grow()
+        self._names.seek(0, os.SEEK_END)
+        name_offset = self._names.tell()
+        self._names.write(f"{username}\n".encode("utf-8"))
+        self._names.flush()
+        # write the record before bumping the count, so a crash never exposes a half-written record
+        MMapBankCache.RECORD.pack_into(self._map, self._record_offset(self.count), int(user_id), amount, name_offset)
+        self.slots[user_id] = self.count
+        self.count += 1
+        MMapBankCache.HEADER.pack_into(self._map, 0, MMapBankCache.MAGIC, self.count)
+
+    def _username(self, user_id:str) -> str:
+        name_offset = MMapBankCache.RECORD.unpack_from(self._map, self._record_offset(self.slots[user_id]))[2]
+        self._names.seek(name_offset)
+        return self._names.readline().decode("utf-8").rstrip("\n")
+
+    def flush(self) -> None:
+        """Writes dirty pages of the bank file to disk."""
+        with self._flush_lock:
+            with self.lock:
+                if not self.dirty or self._map.closed:
+                    return
+                self.dirty = False
+                self._map.flush()
+
+    def close(self) -> None:
+        self._closed.set()
+        self.flush()
+        with self.lock:
+            self._map.close()
+            self._file.close()
+            self._names.close()
+
+
+class GuildMembersCache:
+    """In-memory copy of the guild membership file, shared by every file based connection in the process.\n
+    The file holds one `guild_id,user_id` row per membership and is only ever appended to."""
+
+    _instances:dict[Path, "GuildMembersCache"] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, members_path:Path) -> "GuildMembersCache":
+        key = Path(members_path).resolve()
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(Path(members_path))
+            return cls._instances[key]
+
+    def __init__(self, members_path:Path):
+        self.members_path = members_path
+        self.guilds:dict[str, set[str]] = {} # {guild_id : {user_id, ...}}
+        self.lock = threading.Lock()
+        if members_path.is_file():
+            with open(members_path, "r", newline="", encoding="utf-8") as file:
+                for record in csv.reader(file):
+                    if len(record) == 2:
+                        self.guilds.setdefault(record[0], set()).add(record[1])
+
+    def add(self, guild_id:str, user_ids:list[str]) -> None:
+        with self.lock:
+            members = self.guilds.setdefault(guild_id, set())
+            new_members = [user_id for user_id in user_ids if user_id not in members]
+            if not new_members:
+                return
+            members.update(new_members)
+            with open(self.members_path, "a", newline="", encoding="utf-8") as file:
+                csv.writer(file).writerows((guild_id, user_id) for user_id in new_members)
+
+    def remove(self, guild_id:str, user_ids:list[str]) -> None:
+        with self.lock:
+            members = self.guilds.get(guild_id, set())
+            gone = members.intersection(user_ids)
+            if not gone:
+                return
+            members.difference_update(gone)
+            # removals are rare, so rewrite the file rather than keeping tombstones in it
+            temp_path = self.members_path.with_suffix(".tmp")
+            with open(temp_path, "w", newline="", encoding="utf-8") as file:
+                csv.writer(file).writerows((guild, user_id) for guild, user_ids in self.guilds.items() for user_id in user_ids)
+            os.replace(temp_path, self.members_path)
+
+    def members(self, guild_id:str) -> set[str]:
+        with self.lock:
+            return set(self.guilds.get(guild_id, ()))
+
+
+class TransactionsCache:
+    """Recent tail of the transactions file, shared by every file based connection in the process.\n
+    The file holds one `id,user_id,delta,reason,created_at` row per transaction and is only ever appended to. Only each user's latest `tail` transactions are kept in memory; pages older than that are read from the file."""
+
+    HEADER = "id,user_id,delta,reason,created_at"
+
+    _instances:dict[Path, "TransactionsCache"] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, transactions_path:Path) -> "TransactionsCache":
+        key = Path(transactions_path).resolve()
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(Path(transactions_path))
+            return cls._instances[key]
+
+    def __init__(self, transactions_path:Path, tail:int = 100):
+        self.transactions_path = transactions_path
+        self.tail = tail
+        self.users:dict[str, deque[tuple[int, int, str, int]]] = {} # {user_id : deque of their latest (id, delta, reason, created_at)} oldest first
+        self.truncated:set[str] = set() # users with older transactions than their tail holds
+        self.next_id = 1
+        self.lock = threading.Lock()
+        if not transactions_path.is_file():
+            with open(transactions_path, "w", newline="", encoding="utf-8") as file:
+                file.write(f"{TransactionsCache.HEADER}\n")
+            return
+        for user_id, row in self._read():
+            self._append(user_id, row)
+            self.next_id = max(self.next_id, row[0] + 1)
+
+    def _read(self):
+        """Yields `(user_id, (id, delta, reason, created_at))` for every row in the file, oldest first."""
+        with open(self.transactions_path, "r", newline="", encoding="utf-8") as file:
+            for record in csv.reader(file):
+                try:
+                    transaction_id, user_id, delta, reason, created_at = record
+                    yield user_id, (int(transaction_id), int(delta), reason, int(created_at))
+                except ValueError:
+                    continue # header, or a line torn by a crash
+
+    def _append(self, user_id:str, row:tuple[int, int, str, int]) -> None:
+        rows = self.users.get(user_id)
+        if rows is None:
+            rows = self.users[user_id] = deque(maxlen=self.tail)
+        elif len(rows) == self.tail:
+            self.truncated.add(user_id)
+        rows.append(row)
+
+    def add(self, transactions:list[tuple[str, int, str, int]]) -> None:
+        with self.lock:
+            records = []
+            for user_id, delta, reason, created_at in transactions:
+                row = (self.next_id, int(delta), reason, int(created_at))
+                self._append(user_id, row)
+                records.append((row[0], user_id, *row[1:]))
+                self.next_id += 1
+            with open(self.transactions_path, "a", newline="", encoding="utf-8") as file:
+                csv.writer(file).writerows(records)
+
+    def get(self, user_id:str, before_id:int | None, limit:int) -> list[tuple[int, int, str, int]]:
+        with self.lock:
+            rows = list(self.users.get(user_id, ()))
+            end = len(rows) if before_id is None else bisect.bisect_left(rows, (before_id,))
+            if end >= limit or user_id not in self.truncated:
+                return rows[max(end - limit, 0):end][::-1]
+            # the page reaches past the tail, so scan the file for it
+            before_id = LAST_TRANSACTION_ID if before_id is None else before_id
+            page = deque(maxlen=limit)
+            for row_user_id, row in self._read():
+                if row_user_id == user_id and row[0] < before_id:
+                    page.append(row)
+            return list(page)[::-1]
+
+
+class ThreadsCache:
+    """In-memory copy of the poker threads file, shared by every file based connection in the process.\n
+    The file holds one `user_id,guild_id,thread_id` row per thread, so new threads are appended rather than rewriting the file."""
+
+    HEADER = "user_id,guild_id,thread_id"
+
+    _instances:dict[Path, "ThreadsCache"] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, threads_path:Path, bank_path:Path | None = None) -> "ThreadsCache":
+        """Returns the process-wide cache for `threads_path`. `bank_path` is only read to migrate an old threads file."""
+        key = Path(threads_path).resolve()
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(Path(threads_path), bank_path)
+            return cls._instances[key]
+
+    def __init__(self, threads_path:Path, bank_path:Path | None = None):
+        self.threads_path = threads_path
+        self.bank_path = bank_path
+        self.guilds:dict[str, dict[str, str]] = {} # {guild_id : {user_id : thread_id}}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        with open(self.threads_path, "r", newline="", encoding="utf-8") as file:
+            rows = list(csv.reader(file))
+        if len(rows) == 0 or ",".join(rows[0]) != ThreadsCache.HEADER:
+            self._migrate_wide_format(rows)
+            return
+        for record in rows[1:]:
+            if len(record) == 3:
+                user_id, guild_id, thread_id = record
+                self.guilds.setdefault(guild_id, {})[user_id] = thread_id
+
+    def _user_ids_by_name(self) -> dict[str, str | None]:
+        """Maps each username in the bank to its user id, or to None if more than one user has that name."""
+        ids = {}
+        if self.bank_path is None or not Path(self.bank_path).is_file():
+            return ids
+        with open(self.bank_path, "r", newline="", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                username = row["Username"]
+                ids[username] = row["UserId"] if username not in ids else None
+        return ids
+
+    def _migrate_wide_format(self, rows:list[list[str]]) -> None:
+        """Converts the old threads file, with a row per player and a column per guild, to one row per thread.\n
+        The old file named players by username, so each name is looked up in the bank. Rows whose name isn't in the bank, or belongs to several users, are dropped."""
+        guilds = rows[0][1:] if rows else []
+        user_ids = self._user_ids_by_name()
+        dropped = []
+        for record in rows[1:]:
+            username, thread_ids = record[0], record[1:]
+            user_id = user_ids.get(username)
+            if user_id is None:
+                dropped.append(username)
+                continue
+            for guild_id, thread_id in zip(guilds, thread_ids):
+                if guild_id != "" and thread_id != "": # empty cells meant the player had no thread in that guild
+                    self.guilds.setdefault(guild_id, {})[user_id] = thread_id
+        temp_path = self.threads_path.with_suffix(".tmp")
+        with open(temp_path, "w", newline="", encoding="utf-8") as file:
+            file.write(f"{ThreadsCache.HEADER}\n")
+            csv.writer(file).writerows((user_id, guild_id, thread_id) for guild_id, threads in self.guilds.items() for user_id, thread_id in threads.items())
+        os.replace(temp_path, self.threads_path)
+        if dropped:
+            logger.warning(f"Dropped the threads of {len(dropped)} players from {self.threads_path}, their usernames don't match exactly one user in the bank: {dropped}")
+        logger.info(f"Migrated {self.threads_path} to the long threads format.")
+
+    def add_if_none(self, user_id:str, guild_id:str, thread_id:str) -> bool:
+        """Records a thread unless the user already has one in this guild. Returns True if the thread was added."""
+        with self.lock:
+            guild_threads = self.guilds.setdefault(guild_id, {})
+            if user_id in guild_threads:
+                return False
+            guild_threads[user_id] = thread_id
+            with open(self.threads_path, "a", newline="", encoding="utf-8") as file:
+                csv.writer(file).writerow((user_id, guild_id, thread_id))
+            return True
+
+    def get(self, user_id:str, guild_id:str) -> str:
+        with self.lock:
+            return self.guilds[guild_id][user_id]
+
+    def guild_threads(self, guild_id:str) -> dict[str, str]:
+        with self.lock:
+            return dict(self.guilds.get(guild_id, {}))
+
+
 class CSVConnection(DBConnection):
 
+    conn_type = ConnectionType.csv
+    bank_class = BankCache
+
     def __init__(self, connection_point:str):
-        self.conn_type = ConnectionType.csv
         self.bank_path = Path(BANK_PATH)
         self.threads_path = Path(THREADS_PATH)
         super().__init__(connection_point)
@@ -137,124 +804,166 @@ class CSVConnection(DBConnection):
         
         if not self.threads_path.is_file():
             with open(self.threads_path, "w") as file:
-                file.write("player,\n")
+                file.write(f"{ThreadsCache.HEADER}\n")
+        self.bank = self.bank_class.shared(self.bank_path)
+        self.threads = ThreadsCache.shared(self.threads_path, self.bank_path)
+        self.guild_members = GuildMembersCache.shared(self.bank_path.with_name("guild_members.csv"))
+        self.transactions = TransactionsCache.shared(self.bank_path.with_name("transactions.csv"))
 
-    def create_bank_user_if_none(self, username:str, user_id:str):
-        """Creates a user in the DataFrame if they don't already exist."""
-        df = pd.read_csv(self.bank_path)
-        users = list(df.Username)
-        if username not in users:
-            df.loc[len(df.index)] = [user_id, 1000, username]
-        df.to_csv(self.bank_path, index=False)
-
-    def set_user_amount(self, user_id:str, amount:int) -> None:
-        df = pd.read_csv(self.bank_path)
-        user_index = df.index[df['UserId'] == user_id].tolist()
-        user_index = user_index[0]
-        df.at[user_index, "GleepCoins"] = int(amount)
-        # make sure to write new value to csv
-        df.to_csv(self.bank_path, index=False)
+    def create_bank_user_if_none(self, username:str, user_id:str) -> bool:
+        """Creates a user in the bank if they don't already exist."""
+        self.bank.create_if_none(str(user_id), username)
+        return True
+
+    def is_known_user(self, user_id:str) -> bool:
+        return self.bank.get_amount(str(user_id)) is not None
+
+    def set_user_amount(self, user_id:str, amount:int) -> bool:
+        return self.bank.set_amount(str(user_id), amount)
 
     def get_user_amount(self, user_id) -> int | None:
         """Returns None if user doesn't exist."""
-        df = pd.read_csv(self.bank_path) # we certainly created this file already, upon connect()
-        user_index = df.index[df['UserId'] == user_id].tolist()
-        if len(user_index) == 0:
-            return None
-        user_index = user_index[0]
-        current_amount = df.at[user_index, "GleepCoins"]
-        return int(current_amount)
+        return self.bank.get_amount(str(user_id))
+
+    def adjust_user_amount(self, user_id:str, delta:int, floor:int = 0) -> bool:
+        return self.bank.adjust(str(user_id), int(delta), floor)
+
+    def apply_settlement(self, deltas:dict[str, int]) -> bool:
+        return self.bank.apply({str(user_id): int(delta) for user_id, delta in deltas.items()})
     
-    def stringify_all_user_amounts(self, ctx) -> str:
-        df = pd.read_csv(self.bank_path)
-        df_string = ""
-        for index, row in df.iterrows():
-            username = row["Username"]
-            guild_users = [user.name.lower() for user in ctx.guild.members]
-            if username.lower() in guild_users:
-                df_string += f"{username}: {row['GleepCoins']} GleepCoins\n"
-        return df_string
+    def add_guild_members(self, guild_id:str, user_ids:list[str]) -> None:
+        self.guild_members.add(str(guild_id), [str(user_id) for user_id in user_ids])
+
+    def remove_guild_members(self, guild_id:str, user_ids:list[str]) -> None:
+        self.guild_members.remove(str(guild_id), [str(user_id) for user_id in user_ids])
+
+    def get_guild_member_ids(self, guild_id:str) -> set[str]:
+        return self.guild_members.members(str(guild_id))
+
+    def get_guild_leaderboard(self, guild_id:str, limit:int, offset:int = 0) -> list[tuple[str, int]]:
+        return self.bank.leaderboard(self.guild_members.members(str(guild_id)), limit, offset)
+
+    def record_transactions(self, transactions:list[tuple[str, int, str, int]]) -> bool:
+        try:
+            self.transactions.add([(str(user_id), delta, reason, created_at) for user_id, delta, reason, created_at in transactions])
+        except OSError as e:
+            logger.error(f"Failed to record {len(transactions)} transactions: {e}")
+            return False
+        return True
+
+    def get_user_transactions(self, user_id:str, before_id:int | None = None, limit:int = 10) -> list[tuple[int, int, str, int]]:
+        return self.transactions.get(str(user_id), before_id, int(limit))
     
-    def _write_player_threads(self, guilds_to_player_threads:dict[tuple, str]):
-        """Using a dictionary of `(player_name, guild_id) : thread_id`, writes a .csv file containing the values."""
-        guilds = []
-        players = []
-        # dict structure = {(playerName, guildId) : thread_id}
-        for key in guilds_to_player_threads.keys():
-            guild = key[1]
-            player = key[0]
-            if guild not in guilds:
-                guilds.append(guild)
-            if player not in players:
-                players.append(player)
-
-        # build header row with structure: "players, guildid1, guildid2, guildid3"
-        header_row = "players"
-        for guild in guilds:
-            header_row = f"{header_row},{guild}"
-        with open(self.threads_path, "w") as file:
-            file.write(f"{header_row}\n")
-            # each row represents a player
-            for player in players:
-                # line starts with user's name
-                line = f"{player}"
-                # iterate over the existin guilds headers
-                for guild in guilds:
-                    try:
-                        thread_id:str = guilds_to_player_threads[(player, guild)]
-                    except KeyError:
-                        # add empty/placeholder value if player doesn't have threadID for this guild
-                        thread_id = ""
-                    line = f"{line},{thread_id}"
-                file.write(f"{line}\n")
-
-    def _read_player_threads(self) -> dict[tuple, str]:
-        """Returns a dict with keys like so: (username:str, guild_id:str): thread_id:str"""
-        guild_player_to_threads = {}
-        with open(self.threads_path, "r") as file:
-            # collect header row values (guild IDs)
-            guilds = file.readline().strip("\n").split(",")[1:]
-            # now populate dict with guildId, user_id and thead_id
-            for row in file:
-                # for each row (each player)
-                cols = row.strip("\n").split(",")
-                thread_ids = cols[1:] # thread ids is all columns for the row besides the first one (player's name)
-                user_id = cols[0]
-                # iterate over the thread ids and the guild names at the same time
-                for i in range(len(thread_ids)):
-                    # tuple structure = (user_id:str, guild_id:str)
-                    guild_player_to_threads[(user_id, guilds[i])] = thread_ids[i]
-        return guild_player_to_threads
-            
-    def add_thread_id_if_none(self, user_id: str, thread_id: str, guild_id: str):
-        players_guilds_to_threads = self._read_player_threads()
-        #check if player already has a thread in this guild
-        try: 
-            existing_thread_id = players_guilds_to_threads[(user_id, guild_id)]
-            logger.warn(f"User {user_id} already has a threadId, {existing_thread_id}, for guild with Id - {guild_id}.")
-            return
-        except KeyError:
-            players_guilds_to_threads[(user_id, guild_id)] = thread_id
-        self._write_player_threads(players_guilds_to_threads)
+    def add_thread_id_if_none(self, user_id:str, thread_id:str, guild_id:str) -> bool:
+        if not self.threads.add_if_none(str(user_id), str(guild_id), str(thread_id)):
+            logger.warning(f"User {user_id} already has a threadId, {self.threads.get(str(user_id), str(guild_id))}, for guild with Id - {guild_id}.")
+        return True
     
-    def get_guild_threads(self, guild_id: str) -> dict[str, str]:
-        players_to_threads:dict[str, str] = {}
-        players_guilds_to_threads:dict[tuple[str, str], str] = self._read_player_threads()
-        # get each entry which contains given guild_id
-        for key in players_guilds_to_threads.keys():
-            if key[1] == guild_id:
-                user_id = key[0]
-                thread_id = players_guilds_to_threads[key]
-                players_to_threads[user_id] = thread_id
-        return players_to_threads
+    def get_guild_threads(self, guild_id:str) -> dict[str, str]:
+        return self.threads.guild_threads(str(guild_id))
     
-    def get_user_guild_thread(self, user_id: str, guild_id: str) -> str:
-        guild_threads = self.get_guild_threads(guild_id)
-        return guild_threads[user_id]
+    def get_user_guild_thread(self, user_id:str, guild_id:str) -> str:
+        return self.threads.get(str(user_id), str(guild_id))
+
+
+class LedgerConnection(CSVConnection):
+    """Stores the bank as a csv snapshot plus an append-only ledger of balance changes, so each write is a constant-cost append."""
+
+    conn_type = ConnectionType.ledger
+    bank_class = LedgerBankCache
+
+
+class MMapConnection(CSVConnection):
+    """Stores the bank as fixed-width records in a memory-mapped file, so balance operations cost the same for a million users as for ten."""
+
+    conn_type = ConnectionType.mmap
+    bank_class = MMapBankCache
+
+
+class MySQLConnectionPool:
+    """A process-wide pool of MySQL connections, shared by every MYSQLConnection.\n
+    Connections are checked out for a single operation with `with pool.connection() as connection:`. At most `size` connections are open at once, so the connection count follows concurrency rather than the number of cogs or guilds.
+    Connections that sat idle for longer than `health_check_after` seconds are pinged before being handed out, and replaced if the ping fails."""
+
+    _shared:"MySQLConnectionPool | None" = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "MySQLConnectionPool":
+        """Returns the process-wide pool, creating it on first use."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(MYSQL_POOL_SIZE)
+            return cls._shared
+
+    def __init__(self, size:int, health_check_after:float = 30.0):
+        self.size = size
+        self.health_check_after = health_check_after
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle:list[tuple[float, MySQLConnectionAbstract]] = [] # stack of (time returned, connection)
+        self._idle_lock = threading.Lock()
+
+    def _open(self) -> MySQLConnectionAbstract:
+        logger.debug(f"Opening a new pooled MySQL connection.")
+        return mysql.connector.connect(user = MYSQL_USER,
+                                        password = MYSQL_PASS,
+                                        host = MYSQL_HOST,
+                                        port = MYSQL_PORT,
+                                        database = MYSQL_DATABASE,
+                                        )
+
+    def _is_healthy(self, connection:MySQLConnectionAbstract) -> bool:
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    def _discard(self, connection:MySQLConnectionAbstract) -> None:
+        try:
+            connection.close()
+        except mysql.connector.Error:
+            pass
+
+    def _checkout(self) -> MySQLConnectionAbstract:
+        while True:
+            with self._idle_lock:
+                if not self._idle:
+                    break
+                returned_at, connection = self._idle.pop()
+            if time.monotonic() - returned_at < self.health_check_after or self._is_healthy(connection):
+                return connection
+            logger.info(f"Discarding a stale pooled MySQL connection.")
+            self._discard(connection)
+        return self._open()
+
+    @contextmanager
+    def connection(self):
+        """Checks a connection out of the pool for the duration of the `with` block, blocking while all `size` connections are in use."""
+        self._slots.acquire()
+        connection = None
+        try:
+            connection = self._checkout()
+            yield connection
+        except Exception:
+            # don't hand a connection in an unknown state to the next caller
+            if connection is not None:
+                self._discard(connection)
+                connection = None
+            raise
+        finally:
+            if connection is not None:
+                with self._idle_lock:
+                    self._idle.append((time.monotonic(), connection))
+            self._slots.release()
 
 
 class MYSQLConnection(DBConnection):
 
+    conn_type = ConnectionType.sql
+    _tables_checked = False # tables only need to be checked once per process
+    _known_users:set[str] = set() # user ids this process has already provisioned
+
     def _does_table_exist(self, connection:MySQLConnectionAbstract, table_name:str) -> bool:
         """Checks the MySQL connection for a table named `table_name` in the MySQL database specified in `bot.config`."""
         cursor = connection.cursor()
@@ -308,68 +1017,125 @@ class MYSQLConnection(DBConnection):
             connection.commit()
         return success
 
-    def connect(self):
-        logger.debug(f"Connecting to {self.connection_point} from {self.conn_type}.")
-        connection = mysql.connector.connect(user = MYSQL_USER,
-                                        password = MYSQL_PASS,
-                                        host = MYSQL_HOST,
-                                        port = MYSQL_PORT,
-                                        database = MYSQL_DATABASE,
-                                        )
-        main_table_exists = self._does_table_exist(connection, MAIN_TABLE_NAME)
-        threads_table_exists = self._does_table_exist(connection, THREADS_TABLE_NAME)
-        if not main_table_exists:
-            self._create_main_table(connection)
-        if not threads_table_exists:
-            self._create_threads_table(connection)
-        return connection
-    
-    def _get_user_row(self, user_id:str) -> tuple | None:
-        cursor = self.connection.cursor()
-        user_row = None
+    def _create_guild_members_table(self, connection:MySQLConnectionAbstract) -> bool:
+        """Creates the guild membership table used by the leaderboard."""
+        cursor = connection.cursor()
+        success = False
+        try:
+            cursor.execute(SQLQueryTemplates.CREATE_GUILD_MEMBERS_TABLE.value)
+            success = True
+            logger.info(f"Created '{GUILD_MEMBERS_TABLE_NAME}' table.")
+        except mysql.connector.Error as e:
+            match e.errno:
+                case errorcode.ER_TABLE_EXISTS_ERROR:
+                    logger.debug(f"Attempted to create table '{GUILD_MEMBERS_TABLE_NAME}', but it was already created.")
+                case _:
+                    logger.error(f"{e}")
+        finally:
+            cursor.close()
+            connection.commit()
+        return success
+
+    def _create_transactions_table(self, connection:MySQLConnectionAbstract) -> bool:
+        """Creates the append-only ledger of balance changes. Returns True if the MySQL operation succeeded."""
+        cursor = connection.cursor()
+        success = False
         try:
-            cursor.execute(SQLQueryTemplates.GET_USER.value, (user_id,))
-            user_row = cursor.fetchone()
+            cursor.execute(SQLQueryTemplates.CREATE_TRANSACTIONS_TABLE.value)
+            success = True
+            logger.info(f"Created '{TRANSACTIONS_TABLE_NAME}' table.")
         except mysql.connector.Error as e:
-            logger.error(f"Failed to get a user's info: {user_id}\n{e}")
+            match e.errno:
+                case errorcode.ER_TABLE_EXISTS_ERROR:
+                    logger.debug(f"Attempted to create table '{TRANSACTIONS_TABLE_NAME}', but it was already created.")
+                case _:
+                    logger.error(f"{e}")
         finally:
-            self.connection.commit()
             cursor.close()
+            connection.commit()
+        return success
+
+    def _drop_gleepcoins_index(self, connection:MySQLConnectionAbstract) -> None:
+        """Drops the gleepcoins index older versions created alongside the guild membership table, if it's there."""
+        cursor = connection.cursor()
+        try:
+            cursor.execute(SQLQueryTemplates.DROP_GLEEPCOINS_INDEX.value)
+            logger.info(f"Dropped the gleepcoins index from '{MAIN_TABLE_NAME}'.")
+        except mysql.connector.Error as e:
+            if e.errno != errorcode.ER_CANT_DROP_FIELD_OR_KEY:
+                logger.error(f"{e}")
+        finally:
+            cursor.close()
+            connection.commit()
+
+    def connect(self):
+        logger.debug(f"Connecting to {self.conn_type.value} from {self.connection_point}.")
+        self.pool = MySQLConnectionPool.shared()
+        if MYSQLConnection._tables_checked:
+            return
+        with self.pool.connection() as connection:
+            main_table_exists = self._does_table_exist(connection, MAIN_TABLE_NAME)
+            threads_table_exists = self._does_table_exist(connection, THREADS_TABLE_NAME)
+            guild_members_table_exists = self._does_table_exist(connection, GUILD_MEMBERS_TABLE_NAME)
+            transactions_table_exists = self._does_table_exist(connection, TRANSACTIONS_TABLE_NAME)
+            if not main_table_exists:
+                self._create_main_table(connection)
+            if not threads_table_exists:
+                self._create_threads_table(connection)
+            if not guild_members_table_exists:
+                self._create_guild_members_table(connection)
+            else:
+                self._drop_gleepcoins_index(connection)
+            if not transactions_table_exists:
+                self._create_transactions_table(connection)
+        MYSQLConnection._tables_checked = True
+    
+    def _get_user_row(self, user_id:str) -> tuple | None:
+        user_row = None
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SQLQueryTemplates.GET_USER.value, (user_id,))
+                user_row = cursor.fetchone()
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to get a user's info: {user_id}\n{e}")
+            finally:
+                connection.commit()
+                cursor.close()
         return user_row
     
     def create_bank_user_if_none(self, username, user_id) -> bool:
-        # check if user exists
-        user_row = self._get_user_row(user_id)
-        if user_row is None or len(user_row) == 0:
-            # user doesn't exist
-            # create user
-            user_info = {"user_id": user_id,
-                         "username": username,
-                         "gleepcoins": 1000}
-            success = self._add_new_user(user_info)
-            if not success:
-                logger.error(f"Error creating new row for user, {username}")
-                return False
+        user_id = str(user_id)
+        if user_id in MYSQLConnection._known_users:
+            return True
+        # INSERT IGNORE leaves an existing row alone, so this is a single round trip either way
+        user_info = {"user_id": user_id,
+                     "username": username,
+                     "gleepcoins": 1000}
+        success = self._add_new_user(user_info)
+        if not success:
+            logger.error(f"Error creating new row for user, {username}")
+            return False
+        MYSQLConnection._known_users.add(user_id)
         return True
 
-    def __init__(self, connection_point:str):
-        self.connection_point = connection_point
-        self.conn_type = ConnectionType.sql
-        self.connection = self.connect()
+    def is_known_user(self, user_id:str) -> bool:
+        return str(user_id) in MYSQLConnection._known_users
 
     def _add_new_user(self, user_info:dict) -> bool:
         """user_info must contain all fields from the ADD_USER_TO_BANK query template.\n
         user_id: int, username:str, gleepcoins:int"""
-        cursor = self.connection.cursor()
         success = False
-        try:
-            cursor.execute(SQLQueryTemplates.ADD_USER_TO_BANK.value, user_info)
-            success = True
-        except mysql.connector.Error as e:
-            logger.error(f"Failed to add a user: {user_info}\n{e}")
-        finally:
-            self.connection.commit()
-            cursor.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SQLQueryTemplates.ADD_USER_TO_BANK.value, user_info)
+                success = True
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to add a user: {user_info}\n{e}")
+            finally:
+                connection.commit()
+                cursor.close()
         return success
     
     def get_user_amount(self, user_id:str) -> int | None:
@@ -381,52 +1147,164 @@ class MYSQLConnection(DBConnection):
         return gc
     
     def set_user_amount(self, user_id:str, new_gleepcoins:int) -> bool:
-        cursor = self.connection.cursor()
         success = False
-        try:
-            cursor.execute(SQLQueryTemplates.UPDATE_USER_GLEEPCOINS.value, (new_gleepcoins, user_id))
-            success = True
-        except mysql.connector.Error as e:
-            logger.error(f"Failed to update user_id {user_id}'s gleepcoins: {e}")
-        finally:
-            self.connection.commit()
-            cursor.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SQLQueryTemplates.UPDATE_USER_GLEEPCOINS.value, (new_gleepcoins, user_id))
+                success = True
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to update user_id {user_id}'s gleepcoins: {e}")
+            finally:
+                connection.commit()
+                cursor.close()
         return success
-    
-    def stringify_all_user_amounts(self, ctx) -> str | None:
-        cursor = self.connection.cursor()
-        users_string = ""
+
+    def adjust_user_amount(self, user_id:str, delta:int, floor:int = 0) -> bool:
+        if int(delta) == 0:
+            # an UPDATE that changes nothing reports 0 affected rows, skip the round trip
+            return self.get_user_amount(user_id) is not None
+        success = False
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SQLQueryTemplates.ADJUST_USER_GLEEPCOINS.value, {"user_id": str(user_id), "delta": int(delta), "floor": floor})
+                success = cursor.rowcount == 1
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to adjust user_id {user_id}'s gleepcoins by {delta}: {e}")
+            finally:
+                connection.commit()
+                cursor.close()
+        return success
+
+    def apply_settlement(self, deltas:dict[str, int]) -> bool:
+        # zero deltas would report 0 affected rows, and don't need to be written anyway
+        rows = [{"user_id": str(user_id), "delta": int(delta), "floor": 0} for user_id, delta in deltas.items() if int(delta) != 0]
+        if len(rows) == 0:
+            return True
+        success = False
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(SQLQueryTemplates.ADJUST_USER_GLEEPCOINS.value, rows)
+                success = cursor.rowcount == len(rows)
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to apply settlement {deltas}: {e}")
+            finally:
+                if success:
+                    connection.commit()
+                else:
+                    logger.error(f"Rolling back settlement {deltas}.")
+                    connection.rollback()
+                cursor.close()
+        return success
+
+    def add_guild_members(self, guild_id:str, user_ids:list[str]) -> None:
+        rows = [(str(guild_id), str(user_id)) for user_id in user_ids]
+        if len(rows) == 0:
+            return
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(SQLQueryTemplates.ADD_GUILD_MEMBER.value, rows)
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to add members to {GUILD_MEMBERS_TABLE_NAME} for guild {guild_id}. {e}")
+            finally:
+                connection.commit()
+                cursor.close()
+
+    def remove_guild_members(self, guild_id:str, user_ids:list[str]) -> None:
+        rows = [(str(guild_id), str(user_id)) for user_id in user_ids]
+        if len(rows) == 0:
+            return
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(SQLQueryTemplates.REMOVE_GUILD_MEMBER.value, rows)
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to remove members from {GUILD_MEMBERS_TABLE_NAME} for guild {guild_id}. {e}")
+            finally:
+                connection.commit()
+                cursor.close()
+
+    def get_guild_member_ids(self, guild_id:str) -> set[str]:
         rows:list[tuple] = []
-        try:
-            cursor.execute(SQLQueryTemplates.GET_ALL_ROWS.value)
-            rows = cursor.fetchall()
-        except mysql.connector.Error as e:
-            logger.error(f"Failed to get all rows from table {MAIN_TABLE_NAME}.")
-        finally:
-            self.connection.commit()
-            cursor.close()
-        guild_users = [user.name.lower() for user in ctx.guild.members]
-        for row in rows:
-            username = row[1]
-            gleepcoins = row[2]
-            if username.lower() in guild_users: # only display members of this guild who are in the database
-                users_string += f"{username}: {gleepcoins} GleepCoins\n"
-        return users_string
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SQLQueryTemplates.GET_GUILD_MEMBER_IDS.value, (str(guild_id),))
+                rows = cursor.fetchall()
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to get the members of guild {guild_id}. {e}")
+            finally:
+                connection.commit()
+                cursor.close()
+        return {user_id for (user_id,) in rows}
+
+    def get_guild_leaderboard(self, guild_id:str, limit:int, offset:int = 0) -> list[tuple[str, int]]:
+        rows:list[tuple] = []
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SQLQueryTemplates.GET_GUILD_LEADERBOARD.value, (str(guild_id), int(limit), int(offset)))
+                rows = cursor.fetchall()
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to get the leaderboard for guild {guild_id}. {e}")
+            finally:
+                connection.commit()
+                cursor.close()
+        return [(username, gleepcoins) for username, gleepcoins in rows]
+
+    def record_transactions(self, transactions:list[tuple[str, int, str, int]]) -> bool:
+        rows = [(str(user_id), int(delta), reason, int(created_at)) for user_id, delta, reason, created_at in transactions]
+        if len(rows) == 0:
+            return True
+        success = False
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(SQLQueryTemplates.ADD_TRANSACTION.value, rows)
+                success = True
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to record {len(rows)} transactions: {e}")
+            finally:
+                if success:
+                    connection.commit()
+                else:
+                    connection.rollback()
+                cursor.close()
+        return success
+
+    def get_user_transactions(self, user_id:str, before_id:int | None = None, limit:int = 10) -> list[tuple[int, int, str, int]]:
+        rows:list[tuple] = []
+        before_id = LAST_TRANSACTION_ID if before_id is None else int(before_id)
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SQLQueryTemplates.GET_USER_TRANSACTIONS.value, (str(user_id), before_id, int(limit)))
+                rows = cursor.fetchall()
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to get transactions for user {user_id}. {e}")
+            finally:
+                connection.commit()
+                cursor.close()
+        return [tuple(row) for row in rows]
      
-    def get_guild_threads(self, connection:MySQLConnectionAbstract, guild_id:str) -> dict[str, str]:
+    def get_guild_threads(self, guild_id:str) -> dict[str, str]:
         """Returns a dictionary of {user_id : thread_id} for each player in the database associated with the given `guild_id`."""
-        cursor = connection.cursor()
         guild_threads = {} # dict of {user_id: thread_id}
         rows = []
-        try:
-            cursor.execute(SQLQueryTemplates.GET_GUILD_THREADS.value, (guild_id,))
-            rows:list[tuple] = cursor.fetchall()
-        except mysql.connector.Error as e:
-            logger.error(f"Failed to retrieve rows from {THREADS_TABLE_NAME} table, in `get_guild_threads`. {e}")
-            pass
-        finally:
-            connection.commit()
-            cursor.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SQLQueryTemplates.GET_GUILD_THREADS.value, (str(guild_id),))
+                rows:list[tuple] = cursor.fetchall()
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to retrieve rows from {THREADS_TABLE_NAME} table, in `get_guild_threads`. {e}")
+                pass
+            finally:
+                connection.commit()
+                cursor.close()
         # populate dict with retrieved data
         for row in rows:
             user_id = row[0]
@@ -434,48 +1312,463 @@ class MYSQLConnection(DBConnection):
             guild_threads[user_id] = thread_id
         return guild_threads
     
-    def add_thread_id_if_none(self, connection:MySQLConnectionAbstract, user_id:str, thread_id:str, guild_id:str) -> bool:
-        """Adds a user ID to the {THREAD_TABLE_NAME} table. Return value indicates whether the key exists in the table after this function call.
-        \n user_info:dict - A dictionary containing necessary info about the row to be created, {"user_id": str, "thread_id": str, "guild_id": str}"""
-        cursor = connection.cursor()
+    def add_thread_id_if_none(self, user_id:str, thread_id:str, guild_id:str) -> bool:
+        """Adds a user ID to the {THREAD_TABLE_NAME} table. Return value indicates whether the key exists in the table after this function call."""
         user_dict:dict = {"user_id": user_id, "thread_id": thread_id, "guild_id": guild_id}
-        try:
-            cursor.execute(SQLQueryTemplates.ADD_USER_TO_THREADS.value, user_dict)
-        except mysql.connector.Error as e:
-            match e.errno:
-                case 1062:
-                    logger.info(f"The key ({user_id}, {guild_id}) already exists in this table.")
-                    return True
-                case _:
-                    logger.error(f"Failed to add row to {THREADS_TABLE_NAME}, for follwing info: {user_dict}. {e}")
-                    return False
-        finally:
-            connection.commit()
-            cursor.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SQLQueryTemplates.ADD_USER_TO_THREADS.value, user_dict)
+            except mysql.connector.Error as e:
+                match e.errno:
+                    case 1062:
+                        logger.info(f"The key ({user_id}, {guild_id}) already exists in this table.")
+                        return True
+                    case _:
+                        logger.error(f"Failed to add row to {THREADS_TABLE_NAME}, for follwing info: {user_dict}. {e}")
+                        return False
+            finally:
+                connection.commit()
+                cursor.close()
         return True
     
-    def get_user_guild_thread(self, connection:MySQLConnectionAbstract, user_id:str, guild_id:str) -> str:
-        cursor = connection.cursor()
+    def get_user_guild_thread(self, user_id:str, guild_id:str) -> str:
         id_row = []
-        try:
-            cursor.execute(SQLQueryTemplates.GET_THREAD_ID.value, (user_id, guild_id))
-            id_row:list = cursor.fetchone() # [user_id, guild_id, thread_id]
-        except mysql.connector.Error as e:
-            logger.error(f"Failed to get thread ID for user {user_id} in guild {guild_id}.\n{e}")
-        finally:
-            cursor.close()
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(SQLQueryTemplates.GET_THREAD_ID.value, (user_id, guild_id))
+                id_row:list = cursor.fetchone() # [user_id, guild_id, thread_id]
+            except mysql.connector.Error as e:
+                logger.error(f"Failed to get thread ID for user {user_id} in guild {guild_id}.\n{e}")
+            finally:
+                cursor.close()
         thread_id = id_row[2]
         return thread_id
 
 
+class SQLiteQueryTemplates(Enum):
+
+    CREATE_MAIN_TABLE = (f"CREATE TABLE IF NOT EXISTS {MAIN_TABLE_NAME} ("
+                            "  user_id TEXT PRIMARY KEY,"
+                            "  username TEXT NOT NULL,"
+                            "  gleepcoins INTEGER DEFAULT 1000"
+                            ")")
+
+    CREATE_THREADS_TABLE = (f"CREATE TABLE IF NOT EXISTS {THREADS_TABLE_NAME} ("
+                            "  user_id TEXT,"
+                            "  guild_id TEXT NOT NULL,"
+                            "  thread_id TEXT NOT NULL,"
+                            "  PRIMARY KEY (user_id, guild_id)"
+                            ")")
+
+    CREATE_THREADS_GUILD_INDEX = (f"CREATE INDEX IF NOT EXISTS idx_{THREADS_TABLE_NAME}_guild "
+                                  f"ON {THREADS_TABLE_NAME} (guild_id, user_id)")
+
+    ADD_USER_TO_BANK = (f"INSERT INTO {MAIN_TABLE_NAME} "
+                        "(user_id, username, gleepcoins) "
+                        "VALUES (:user_id, :username, :gleepcoins) "
+                        "ON CONFLICT (user_id) DO NOTHING")
+
+    ADD_USER_TO_THREADS = (f"INSERT INTO {THREADS_TABLE_NAME} "
+                            "(user_id, guild_id, thread_id) "
+                            "VALUES (:user_id, :guild_id, :thread_id) "
+                            "ON CONFLICT (user_id, guild_id) DO NOTHING")
+
+    GET_GLEEPCOINS = (f"SELECT gleepcoins FROM {MAIN_TABLE_NAME} "
+                      "WHERE user_id = ?")
+
+    GET_GUILD_THREADS = (f"SELECT user_id, thread_id FROM {THREADS_TABLE_NAME} "
+                         "WHERE guild_id = ?")
+
+    GET_THREAD_ID = (f"SELECT thread_id FROM {THREADS_TABLE_NAME} "
+                     "WHERE user_id = ? AND guild_id = ?")
+
+    UPDATE_USER_GLEEPCOINS = (f"UPDATE {MAIN_TABLE_NAME} "
+                              "SET gleepcoins = ? "
+                              "WHERE user_id = ?")
+
+    ADJUST_USER_GLEEPCOINS = (f"UPDATE {MAIN_TABLE_NAME} "
+                              "SET gleepcoins = gleepcoins + :delta "
+                              "WHERE user_id = :user_id AND gleepcoins + :delta >= :floor")
+
+    CREATE_GUILD_MEMBERS_TABLE = (f"CREATE TABLE IF NOT EXISTS {GUILD_MEMBERS_TABLE_NAME} ("
+                                  "  guild_id TEXT NOT NULL,"
+                                  "  user_id TEXT NOT NULL,"
+                                  "  PRIMARY KEY (guild_id, user_id)"
+                                  ") WITHOUT ROWID")
+
+    # an earlier version indexed gleepcoins for the leaderboard, but it can't serve the guild filtered sort and slows every balance update
+    DROP_GLEEPCOINS_INDEX = (f"DROP INDEX IF EXISTS idx_{MAIN_TABLE_NAME}_gleepcoins")
+
+    ADD_GUILD_MEMBER = (f"INSERT INTO {GUILD_MEMBERS_TABLE_NAME} "
+                        "(guild_id, user_id) "
+                        "VALUES (?, ?) "
+                        "ON CONFLICT (guild_id, user_id) DO NOTHING")
+
+    REMOVE_GUILD_MEMBER = (f"DELETE FROM {GUILD_MEMBERS_TABLE_NAME} "
+                           "WHERE guild_id = ? AND user_id = ?")
+
+    GET_GUILD_MEMBER_IDS = (f"SELECT user_id FROM {GUILD_MEMBERS_TABLE_NAME} "
+                            "WHERE guild_id = ?")
+
+    GET_GUILD_LEADERBOARD = (f"SELECT u.username, u.gleepcoins FROM {GUILD_MEMBERS_TABLE_NAME} g "
+                             f"JOIN {MAIN_TABLE_NAME} u ON u.user_id = g.user_id "
+                             "WHERE g.guild_id = ? "
+                             "ORDER BY u.gleepcoins DESC, u.user_id "
+                             "LIMIT ? OFFSET ?")
+
+    CREATE_TRANSACTIONS_TABLE = (f"CREATE TABLE IF NOT EXISTS {TRANSACTIONS_TABLE_NAME} ("
+                                 "  id INTEGER PRIMARY KEY,"
+                                 "  user_id TEXT NOT NULL,"
+                                 "  delta INTEGER NOT NULL,"
+                                 "  reason TEXT NOT NULL,"
+                                 "  created_at INTEGER NOT NULL"
+                                 ")")
+
+    CREATE_TRANSACTIONS_USER_INDEX = (f"CREATE INDEX IF NOT EXISTS idx_{TRANSACTIONS_TABLE_NAME}_user "
+                                      f"ON {TRANSACTIONS_TABLE_NAME} (user_id, id)")
+
+    ADD_TRANSACTION = (f"INSERT INTO {TRANSACTIONS_TABLE_NAME} "
+                       "(user_id, delta, reason, created_at) "
+                       "VALUES (?, ?, ?, ?)")
+
+    GET_USER_TRANSACTIONS = (f"SELECT id, delta, reason, created_at FROM {TRANSACTIONS_TABLE_NAME} "
+                             "WHERE user_id = ? AND id < ? "
+                             "ORDER BY id DESC "
+                             "LIMIT ?")
+
+
+class SQLiteConnection(DBConnection):
+    """Stores data in a local SQLite database file, in WAL mode so readers don't block the writer.\n
+    Each db worker thread keeps its own connection, and sqlite caches the prepared statement for each query template."""
+
+    conn_type = ConnectionType.sqlite
+    _schema_ready = False # schema only needs to be created once per process
+    _schema_lock = threading.Lock()
+    _local = threading.local() # per-thread sqlite connections
+    _known_users:set[str] = set() # user ids this process has already provisioned
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(SQLiteConnection._local, "connection", None)
+        if connection is None:
+            # autocommit mode, multi-statement writes open their own transaction
+            connection = sqlite3.connect(self.db_path, timeout=10.0, isolation_level=None, cached_statements=256)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            SQLiteConnection._local.connection = connection
+        return connection
+
+    def connect(self):
+        logger.debug(f"Connecting to {self.conn_type.value} from {self.connection_point}.")
+        self.db_path = Path(SQLITE_PATH)
+        with SQLiteConnection._schema_lock:
+            if SQLiteConnection._schema_ready:
+                return
+            connection = self._connection()
+            for template in (SQLiteQueryTemplates.CREATE_MAIN_TABLE, SQLiteQueryTemplates.CREATE_THREADS_TABLE, SQLiteQueryTemplates.CREATE_THREADS_GUILD_INDEX,
+                             SQLiteQueryTemplates.CREATE_GUILD_MEMBERS_TABLE, SQLiteQueryTemplates.DROP_GLEEPCOINS_INDEX,
+                             SQLiteQueryTemplates.CREATE_TRANSACTIONS_TABLE, SQLiteQueryTemplates.CREATE_TRANSACTIONS_USER_INDEX):
+                connection.execute(template.value)
+            SQLiteConnection._schema_ready = True
+
+    def create_bank_user_if_none(self, username:str, user_id:str) -> bool:
+        user_id = str(user_id)
+        if user_id in SQLiteConnection._known_users:
+            return True
+        user_info = {"user_id": user_id, "username": username, "gleepcoins": 1000}
+        try:
+            self._connection().execute(SQLiteQueryTemplates.ADD_USER_TO_BANK.value, user_info)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to add a user: {user_info}\n{e}")
+            return False
+        SQLiteConnection._known_users.add(user_id)
+        return True
+
+    def is_known_user(self, user_id:str) -> bool:
+        return str(user_id) in SQLiteConnection._known_users
+
+    def get_user_amount(self, user_id:str) -> int | None:
+        try:
+            row = self._connection().execute(SQLiteQueryTemplates.GET_GLEEPCOINS.value, (str(user_id),)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get a user's gleepcoins: {user_id}\n{e}")
+            return None
+        return None if row is None else row[0]
+
+    def set_user_amount(self, user_id:str, amount:int) -> bool:
+        try:
+            cursor = self._connection().execute(SQLiteQueryTemplates.UPDATE_USER_GLEEPCOINS.value, (int(amount), str(user_id)))
+        except sqlite3.Error as e:
+            logger.error(f"Failed to update user_id {user_id}'s gleepcoins: {e}")
+            return False
+        return cursor.rowcount == 1
+
+    def adjust_user_amount(self, user_id:str, delta:int, floor:int = 0) -> bool:
+        try:
+            cursor = self._connection().execute(SQLiteQueryTemplates.ADJUST_USER_GLEEPCOINS.value, {"user_id": str(user_id), "delta": int(delta), "floor": floor})
+        except sqlite3.Error as e:
+            logger.error(f"Failed to adjust user_id {user_id}'s gleepcoins by {delta}: {e}")
+            return False
+        return cursor.rowcount == 1
+
+    def apply_settlement(self, deltas:dict[str, int]) -> bool:
+        rows = [{"user_id": str(user_id), "delta": int(delta), "floor": 0} for user_id, delta in deltas.items()]
+        if len(rows) == 0:
+            return True
+        connection = self._connection()
+        success = False
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            cursor = connection.executemany(SQLiteQueryTemplates.ADJUST_USER_GLEEPCOINS.value, rows)
+            success = cursor.rowcount == len(rows)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to apply settlement {deltas}: {e}")
+        finally:
+            if connection.in_transaction:
+                connection.execute("COMMIT" if success else "ROLLBACK")
+        return success
+
+    def add_guild_members(self, guild_id:str, user_ids:list[str]) -> None:
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN")
+            connection.executemany(SQLiteQueryTemplates.ADD_GUILD_MEMBER.value, [(str(guild_id), str(user_id)) for user_id in user_ids])
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to add members to {GUILD_MEMBERS_TABLE_NAME} for guild {guild_id}. {e}")
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+
+    def remove_guild_members(self, guild_id:str, user_ids:list[str]) -> None:
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN")
+            connection.executemany(SQLiteQueryTemplates.REMOVE_GUILD_MEMBER.value, [(str(guild_id), str(user_id)) for user_id in user_ids])
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to remove members from {GUILD_MEMBERS_TABLE_NAME} for guild {guild_id}. {e}")
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+
+    def get_guild_member_ids(self, guild_id:str) -> set[str]:
+        try:
+            return {user_id for (user_id,) in self._connection().execute(SQLiteQueryTemplates.GET_GUILD_MEMBER_IDS.value, (str(guild_id),))}
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get the members of guild {guild_id}. {e}")
+            return set()
+
+    def get_guild_leaderboard(self, guild_id:str, limit:int, offset:int = 0) -> list[tuple[str, int]]:
+        try:
+            return self._connection().execute(SQLiteQueryTemplates.GET_GUILD_LEADERBOARD.value, (str(guild_id), int(limit), int(offset))).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get the leaderboard for guild {guild_id}. {e}")
+            return []
+
+    def record_transactions(self, transactions:list[tuple[str, int, str, int]]) -> bool:
+        rows = [(str(user_id), int(delta), reason, int(created_at)) for user_id, delta, reason, created_at in transactions]
+        if len(rows) == 0:
+            return True
+        connection = self._connection()
+        try:
+            connection.execute("BEGIN")
+            connection.executemany(SQLiteQueryTemplates.ADD_TRANSACTION.value, rows)
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.error(f"Failed to record {len(rows)} transactions: {e}")
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            return False
+        return True
+
+    def get_user_transactions(self, user_id:str, before_id:int | None = None, limit:int = 10) -> list[tuple[int, int, str, int]]:
+        before_id = LAST_TRANSACTION_ID if before_id is None else int(before_id)
+        try:
+            return self._connection().execute(SQLiteQueryTemplates.GET_USER_TRANSACTIONS.value, (str(user_id), before_id, int(limit))).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get transactions for user {user_id}. {e}")
+            return []
+
+    def add_thread_id_if_none(self, user_id:str, thread_id:str, guild_id:str) -> bool:
+        user_dict = {"user_id": str(user_id), "thread_id": str(thread_id), "guild_id": str(guild_id)}
+        try:
+            self._connection().execute(SQLiteQueryTemplates.ADD_USER_TO_THREADS.value, user_dict)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to add row to {THREADS_TABLE_NAME}, for following info: {user_dict}. {e}")
+            return False
+        return True
+
+    def get_guild_threads(self, guild_id:str) -> dict[str, str]:
+        try:
+            rows = self._connection().execute(SQLiteQueryTemplates.GET_GUILD_THREADS.value, (str(guild_id),)).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to retrieve rows from {THREADS_TABLE_NAME} table, in `get_guild_threads`. {e}")
+            rows = []
+        return {user_id: thread_id for user_id, thread_id in rows}
+
+    def get_user_guild_thread(self, user_id:str, guild_id:str) -> str:
+        row = self._connection().execute(SQLiteQueryTemplates.GET_THREAD_ID.value, (str(user_id), str(guild_id))).fetchone()
+        return row[0]
+
+
+class AsyncDBConnection:
+    """Awaitable version of the DBConnection interface, for use from coroutines.\n
+    Each call runs the wrapped DBConnection's method on a shared, bounded thread pool, so slow queries and file I/O don't block the event loop."""
+
+    # sized to the MySQL pool so a worker never waits on a connection while holding a thread
+    _executor = ThreadPoolExecutor(max_workers=MYSQL_POOL_SIZE, thread_name_prefix="db-worker")
+
+    def __init__(self, connection:DBConnection):
+        self.sync = connection
+        self.conn_type = connection.conn_type
+        self.connection_point = connection.connection_point
+
+    async def _run(self, method, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(AsyncDBConnection._executor, partial(method, *args))
+
+    async def create_bank_user_if_none(self, username:str, user_id:str) -> bool:
+        if self.sync.is_known_user(user_id):
+            # already provisioned, skip the executor hop
+            return True
+        return await self._run(self.sync.create_bank_user_if_none, username, user_id)
+
+    def is_known_user(self, user_id:str) -> bool:
+        return self.sync.is_known_user(user_id)
+
+    async def set_user_amount(self, user_id:str, amount:int) -> bool:
+        return await self._run(self.sync.set_user_amount, user_id, amount)
+
+    async def get_user_amount(self, user_id:str) -> int | None:
+        return await self._run(self.sync.get_user_amount, user_id)
+
+    async def adjust_user_amount(self, user_id:str, delta:int, floor:int = 0) -> bool:
+        return await self._run(self.sync.adjust_user_amount, user_id, delta, floor)
+
+    async def apply_settlement(self, deltas:dict[str, int]) -> bool:
+        return await self._run(self.sync.apply_settlement, deltas)
+
+    async def add_guild_members(self, guild_id:str, user_ids:list[str]) -> None:
+        return await self._run(self.sync.add_guild_members, guild_id, user_ids)
+
+    async def remove_guild_members(self, guild_id:str, user_ids:list[str]) -> None:
+        return await self._run(self.sync.remove_guild_members, guild_id, user_ids)
+
+    async def get_guild_member_ids(self, guild_id:str) -> set[str]:
+        return await self._run(self.sync.get_guild_member_ids, guild_id)
+
+    async def get_guild_leaderboard(self, guild_id:str, limit:int, offset:int = 0) -> list[tuple[str, int]]:
+        return await self._run(self.sync.get_guild_leaderboard, guild_id, limit, offset)
+
+    async def record_transactions(self, transactions:list[tuple[str, int, str, int]]) -> bool:
+        return await self._run(self.sync.record_transactions, transactions)
+
+    async def get_user_transactions(self, user_id:str, before_id:int | None = None, limit:int = 10) -> list[tuple[int, int, str, int]]:
+        return await self._run(self.sync.get_user_transactions, user_id, before_id, limit)
+
+    async def add_thread_id_if_none(self, user_id:str, thread_id:str, guild_id:str) -> bool:
+        return await self._run(self.sync.add_thread_id_if_none, user_id, thread_id, guild_id)
+
+    async def get_guild_threads(self, guild_id:str) -> dict[str, str]:
+        return await self._run(self.sync.get_guild_threads, guild_id)
+
+    async def get_user_guild_thread(self, user_id:str, guild_id:str) -> str:
+        return await self._run(self.sync.get_user_guild_thread, user_id, guild_id)
+
+
+class TransactionQueue:
+    """Collects transaction records in memory and writes them to the ledger in batches, off the event loop.\n
+    `record()` only appends to a list, so it never adds latency to the command that caused the transaction. A background task flushes the list every `flush_interval` seconds, or sooner once `batch_size` records are waiting, and whatever's left is written when the process exits."""
+
+    _shared:"TransactionQueue | None" = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> "TransactionQueue":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(get_async_db_connection("transaction queue"))
+            return cls._shared
+
+    def __init__(self, connection:AsyncDBConnection, batch_size:int = 200, flush_interval:float = 2.0):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending:list[tuple[str, int, str, int]] = []
+        self.lock = threading.Lock() # guards `pending`, the exit flush runs outside the event loop
+        self._task:asyncio.Task | None = None
+        self._wake:asyncio.Event | None = None
+        atexit.register(self.close)
+
+    def record(self, user_id:str, delta:int, reason:str) -> None:
+        """Queues one transaction. Zero deltas aren't recorded."""
+        if int(delta) == 0:
+            return
+        with self.lock:
+            self.pending.append((str(user_id), int(delta), reason, int(time.time())))
+            waiting = len(self.pending)
+        self._start()
+        if waiting >= self.batch_size and self._wake is not None:
+            self._wake.set()
+
+    def _start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return # no event loop, the exit flush will write the records
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def _take(self) -> list[tuple[str, int, str, int]]:
+        with self.lock:
+            batch, self.pending = self.pending, []
+        return batch
+
+    def _put_back(self, batch:list[tuple[str, int, str, int]]) -> None:
+        with self.lock:
+            self.pending[:0] = batch
+
+    async def flush(self) -> None:
+        """Writes every queued record to the ledger."""
+        batch = self._take()
+        if batch and not await self.connection.record_transactions(batch):
+            # keep the records for the next flush rather than losing them
+            self._put_back(batch)
+
+    def close(self) -> None:
+        batch = self._take()
+        if batch and not self.connection.sync.record_transactions(batch):
+            logger.error(f"Lost {len(batch)} transactions while shutting down.")
+
+
 def get_db_connection(connection_point:str) -> DBConnection:
-    """Returns a Connection instance based on the `db_option` value in `bot.config`.\n\nValid values include: `csv` and `mysql`."""
+    """Returns a Connection instance based on the `db_option` value in `bot.config`.\n\nValid values include: `csv`, `ledger`, `mmap`, `sqlite` and `mysql`."""
     match DB_OPTION:
         case "csv":
             return CSVConnection(connection_point)
+        case "ledger":
+            return LedgerConnection(connection_point)
+        case "mmap":
+            return MMapConnection(connection_point)
         case "mysql":
             return MYSQLConnection(connection_point)
+        case "sqlite":
+            return SQLiteConnection(connection_point)
         case _:
             raise ValueError("Inappropriate value for key `db_option` in `bot.config` file.")
-    
-    
+
+
+def get_async_db_connection(connection_point:str) -> AsyncDBConnection:
+    """Returns an AsyncDBConnection wrapping the Connection chosen by `db_option` in `bot.config`."""
+    return AsyncDBConnection(get_db_connection(connection_point))
@@ -0,0 +1,322 @@
+import math
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from enum import IntEnum
+from pathlib import Path
+from collections import deque
+
+from discord import Embed, Message, HTTPException, NotFound, Forbidden
+
+from config.configuration import WORKING_DIRECTORY
+
+logger = logging.Logger("messaging_logger")
+messaging_log_path = Path(WORKING_DIRECTORY) / "messaging.log"
+messaging_log_handler = logging.FileHandler(messaging_log_path, encoding="utf-8", mode="w")
+formatter = logging.Formatter('[%(asctime)s - %(levelname)s] - %(message)s')
+messaging_log_handler.setFormatter(formatter)
+logger.addHandler(messaging_log_handler)
+
+BULK_DELETE_LIMIT = 100 # most messages Discord will delete in one request
+
+
+class Priority(IntEnum):
+    """Classes of outbound traffic, most urgent first."""
+    INTERACTIVE = 0 # prompts a player is about to answer, their timers are already running
+    GAME_STATE = 1 # the live table, pots and actions
+    NOTIFICATION = 2 # results, "Playing" embeds and other announcements
+    CLEANUP = 3 # deleting expired messages, dropped first under pressure
+
+
+class RouteBucket:
+    """
+    Local copy of one Discord rate limit bucket: `limit` requests every `per` seconds, refilled continuously.\n
+    Requests that can't go out right away wait in `waiting`, a heap served most urgent first."""
+    def __init__(self, limit:int, per:float):
+        self.limit = limit
+        self.per = per
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+        self.waiting:list[tuple[int, int, float, asyncio.Future]] = [] # (priority, order, queued_at, future)
+        self.pump:asyncio.Task | None = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.limit / self.per)
+        self.updated = now
+
+    def take(self) -> bool:
+        """Uses up one request, if there's one left."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def untilNext(self) -> float:
+        """Seconds until the bucket holds another request."""
+        return max(0.0, (1 - self.tokens) * self.per / self.limit)
+
+    def isIdle(self) -> bool:
+        self._refill()
+        return not self.waiting and self.tokens >= self.limit
+
+
+class RestScheduler:
+    """
+    Spends the bot's REST budget on the most urgent traffic first.\n
+    Every request names its route (what Discord rate limits it by, like sending messages in one channel) and a Priority. Each route has a local bucket, and once it runs dry, waiting requests go out in priority order. Cleanup is dropped instead of queued once `cleanup_backlog` requests are already waiting on its route, or once it has waited `cleanup_max_wait` seconds."""
+
+    _shared = None
+
+    def __init__(self, limit:int = 5, per:float = 5.0, cleanup_backlog:int = 10, cleanup_max_wait:float = 60.0):
+        self.limit = limit
+        self.per = per
+        self.cleanup_backlog = cleanup_backlog
+        self.cleanup_max_wait = cleanup_max_wait
+        self.buckets:dict[tuple, RouteBucket] = {}
+        self.dropped = 0 # cleanup requests given up on
+        self._order = itertools.count() # keeps requests of the same priority first come, first served
+
+    @classmethod
+    def shared(cls) -> "RestScheduler":
+        """Returns the scheduler shared by every cog, since they all spend the same bot's rate limits."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def _bucket(self, route:tuple) -> RouteBucket:
+        bucket = self.buckets.get(route)
+        if bucket is None:
+            if len(self.buckets) >= 1000:
+                # forget routes that have fully recovered, they'd start out full anyway
+                for idle_route in [r for r, b in self.buckets.items() if b.isIdle()]:
+                    del self.buckets[idle_route]
+            bucket = RouteBucket(self.limit, self.per)
+            self.buckets[route] = bucket
+        return bucket
+
+    async def _acquire(self, route:tuple, priority:Priority) -> bool:
+        """Waits for this request's turn on `route`. Returns False if it was dropped instead."""
+        bucket = self._bucket(route)
+        if not bucket.waiting and bucket.take():
+            return True
+        if priority is Priority.CLEANUP and len(bucket.waiting) >= self.cleanup_backlog:
+            self.dropped += 1
+            return False
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(bucket.waiting, (priority, next(self._order), time.monotonic(), future))
+        if bucket.pump is None or bucket.pump.done():
+            bucket.pump = asyncio.create_task(self._pump(bucket))
+        return await future
+
+    async def _pump(self, bucket:RouteBucket) -> None:
+        """Lets waiting requests through as the bucket refills, most urgent first."""
+        while bucket.waiting:
+            if not bucket.take():
+                await asyncio.sleep(bucket.untilNext())
+                continue
+            while bucket.waiting:
+                priority, _, queued_at, future = heapq.heappop(bucket.waiting)
+                if future.done():
+                    continue # the caller gave up waiting
+                if priority is Priority.CLEANUP and time.monotonic() - queued_at > self.cleanup_max_wait:
+                    self.dropped += 1
+                    future.set_result(False)
+                    continue
+                future.set_result(True)
+                break
+            else:
+                bucket.tokens += 1 # nobody was left to use it
+
+    async def request(self, route:tuple, priority:Priority, call, *args, **kwargs):
+        """Runs `call(*args, **kwargs)` once `route` has room for it. Returns its result, or None if it was dropped."""
+        if await self._acquire(route, priority):
+            return await call(*args, **kwargs)
+        return None
+
+    async def send(self, channel, priority:Priority, **kwargs):
+        """Sends a message to `channel`, see `channel.send`."""
+        return await self.request(("send", channel.id), priority, channel.send, **kwargs)
+
+    async def edit(self, message, priority:Priority, **kwargs):
+        """Edits one of the bot's messages, see `message.edit`."""
+        return await self.request(("edit", message.channel.id), priority, message.edit, **kwargs)
+
+
+class DeletionScheduler:
+    """
+    Deletes messages after a delay, in place of `message.delete(delay=...)`.\n
+    Messages are dropped into the slots of a timing wheel that one task turns every `resolution` seconds, and everything expiring in the same channel on the same tick goes out in one bulk delete. Messages are never deleted early. Deletes are cleanup traffic to the RestScheduler, so they wait behind anything more urgent, and may be dropped when a channel is busy."""
+
+    _shared = None
+
+    def __init__(self, resolution:float = 1.0, slots:int = 64):
+        self.resolution = resolution
+        # each slot maps a channel id to the messages expiring there, as [turns_left, message], turns_left counting full trips around the wheel
+        self.wheel:list[dict[int, list[list]]] = [{} for _ in range(slots)]
+        self.cursor = 0
+        self.pending = 0
+        self._last_tick = 0.0
+        self._task:asyncio.Task | None = None
+        self._deleting:set[asyncio.Task] = set()
+        self.no_bulk_delete:set[int] = set() # ids of channels where bulk deleting was forbidden
+        self.rest = RestScheduler.shared()
+
+    @classmethod
+    def shared(cls) -> "DeletionScheduler":
+        """Returns the scheduler shared by every cog, so messages from all of them expire on the same wheel."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def schedule(self, message:Message, delay:float) -> None:
+        """Deletes `message` once `delay` seconds have passed."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._last_tick = loop.time()
+            self._task = asyncio.create_task(self._turn())
+        # count ticks from the last one, since the wheel has already moved partway to the next
+        ticks = max(1, math.ceil((loop.time() - self._last_tick + delay) / self.resolution))
+        slot = (self.cursor + ticks) % len(self.wheel)
+        turns_left = (ticks - 1) // len(self.wheel)
+        self.wheel[slot].setdefault(message.channel.id, []).append([turns_left, message])
+        self.pending += 1
+
+    async def _turn(self) -> None:
+        """Turns the wheel until nothing is left on it."""
+        loop = asyncio.get_running_loop()
+        while self.pending > 0:
+            # sleep until the next tick is due, so a slow delete doesn't push back every later one
+            await asyncio.sleep(max(0.0, self._last_tick + self.resolution - loop.time()))
+            self._last_tick += self.resolution
+            self.cursor = (self.cursor + 1) % len(self.wheel)
+            for messages in self._expire(self.cursor):
+                # deletes wait behind more urgent traffic, so they mustn't hold up the wheel
+                task = asyncio.create_task(self._delete(messages))
+                self._deleting.add(task)
+                task.add_done_callback(self._deleting.discard)
+
+    def _expire(self, slot:int) -> list[list[Message]]:
+        """Takes the messages due on this tick out of `slot`, grouped by channel. Messages due on a later trip around the wheel stay put."""
+        due = []
+        channels = self.wheel[slot]
+        for channel_id in list(channels):
+            expired = []
+            waiting = []
+            for entry in channels[channel_id]:
+                if entry[0] == 0:
+                    expired.append(entry[1])
+                else:
+                    entry[0] -= 1
+                    waiting.append(entry)
+            if waiting:
+                channels[channel_id] = waiting
+            else:
+                del channels[channel_id]
+            if expired:
+                due.append(expired)
+        return due
+
+    async def _delete(self, messages:list[Message]) -> None:
+        """Deletes messages from one channel, up to BULK_DELETE_LIMIT per request."""
+        self.pending -= len(messages)
+        # the same message scheduled twice would fail the whole bulk request
+        messages = list({message.id: message for message in messages}.values())
+        channel = messages[0].channel
+        for i in range(0, len(messages), BULK_DELETE_LIMIT):
+            batch = messages[i:i + BULK_DELETE_LIMIT]
+            # DMs can't bulk delete, and a single message doesn't need to
+            if len(batch) > 1 and hasattr(channel, "delete_messages") and channel.id not in self.no_bulk_delete:
+                try:
+                    await self.rest.request(("bulk delete", channel.id), Priority.CLEANUP, channel.delete_messages, batch)
+                    continue
+                except Forbidden:
+                    # bulk deleting needs Manage Messages, though the bot can still delete its own messages one by one.
+                    # don't spend another request and 403 on it every tick
+                    self.no_bulk_delete.add(channel.id)
+                except HTTPException as e:
+                    logger.warning(f"Bulk delete of {len(batch)} messages in channel {channel.id} failed, deleting them one by one: {e}")
+            for message in batch:
+                try:
+                    await self.rest.request(("delete", channel.id), Priority.CLEANUP, message.delete)
+                except NotFound:
+                    pass # already deleted by someone else
+                except HTTPException as e:
+                    logger.warning(f"Couldn't delete message {message.id} in channel {channel.id}: {e}")
+
+
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARACTERS = 6000 # across every embed in one message
+
+
+class OutboundQueue:
+    """
+    Sends embeds to a channel in as few messages as possible.\n
+    Embeds queued for the same channel within `window` seconds of each other are packed, in order, into messages of up to MAX_EMBEDS_PER_MESSAGE embeds and MAX_EMBED_CHARACTERS characters. Embeds only share a message if they're meant to be deleted after the same delay."""
+
+    _shared = None
+
+    def __init__(self, window:float = 0.25):
+        self.window = window
+        self.queues:dict[int, deque] = {} # channel id : deque of (embed, delete_after, future)
+        self._tasks:dict[int, asyncio.Task] = {}
+        self.deleter = DeletionScheduler.shared()
+        self.rest = RestScheduler.shared()
+
+    @classmethod
+    def shared(cls) -> "OutboundQueue":
+        """Returns the queue shared by every cog, so embeds sent to one channel from different games still get packed together."""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def send(self, channel, embed:Embed, delete_after:float | None = None) -> asyncio.Future:
+        """Queues `embed` for `channel`. Returns a future for the message it ends up in, or None if sending failed."""
+        future = asyncio.get_running_loop().create_future()
+        self.queues.setdefault(channel.id, deque()).append((embed, delete_after, future))
+        if channel.id not in self._tasks:
+            self._tasks[channel.id] = asyncio.create_task(self._drain(channel))
+        return future
+
+    async def flush(self, channel) -> None:
+        """Waits until everything queued for `channel` has been sent, so whatever's sent next shows up after it."""
+        task = self._tasks.get(channel.id)
+        if task is not None:
+            await asyncio.shield(task)
+
+    def _pack(self, queue:deque) -> list[tuple]:
+        """Takes as many embeds off the front of `queue` as fit in one message."""
+        batch = [queue.popleft()]
+        characters = len(batch[0][0])
+        while queue and len(batch) < MAX_EMBEDS_PER_MESSAGE:
+            embed, delete_after, _ = queue[0]
+            if delete_after != batch[0][1] or characters + len(embed) > MAX_EMBED_CHARACTERS:
+                break
+            batch.append(queue.popleft())
+            characters += len(embed)
+        return batch
+
+    async def _drain(self, channel) -> None:
+        queue = self.queues[channel.id]
+        try:
+            # give the rest of the burst a moment to arrive
+            await asyncio.sleep(self.window)
+            while queue:
+                batch = self._pack(queue)
+                try:
+                    message = await self.rest.send(channel, Priority.NOTIFICATION, embeds=[embed for embed, _, _ in batch])
+                except HTTPException as e:
+                    logger.warning(f"Couldn't send {len(batch)} queued embeds to channel {channel.id}: {e}")
+                    message = None
+                if message is not None and batch[0][1] is not None:
+                    self.deleter.schedule(message, batch[0][1])
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(message)
+        finally:
+            del self._tasks[channel.id]
+            if not queue:
+                del self.queues[channel.id]